@@ -0,0 +1,201 @@
+"""Offline throughput benchmark: synthetic catalogs through the engine against the mock LLM.
+
+Each (service, size) case runs in a fresh interpreter so its peak RSS is its own, while
+the mock server keeps running in this process. Results are printed as a table (or JSON
+lines), can be saved as a baseline and compared against one to catch regressions:
+
+    python -m benchmarks.bench --sizes 1000,10000,100000 --latency 0.05 --save baseline.json
+    python -m benchmarks.bench --compare baseline.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+import polib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_llm import MockLLM, add_arguments, base_url, settings_from
+from core.api_manager import APIManager
+from core.engine import TranslationEngine
+from core.rate_limiter import AdaptiveRateLimiter
+from models.api_models import APIModels
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORDS = ("save settings file plugin update delete page post user account password email theme widget menu "
+         "option field value image upload download search results comment reply category tag archive "
+         "error warning success message draft publish schedule preview custom default general advanced").split()
+
+def synthetic_catalog(path: str, size: int, seed: int = 1):
+    """Write a catalog of `size` entries resembling a WordPress plugin: repeats, contexts and placeholders."""
+    rng = random.Random(seed)
+    po = polib.POFile(wrapwidth=0)
+    po.metadata = {"Project-Id-Version": "bench", "Content-Type": "text/plain; charset=UTF-8"}
+    seen: List[str] = []
+    for idx in range(size):
+        if seen and rng.random() < 0.08:
+            msgid = rng.choice(seen)
+            msgctxt = f"screen {idx}"  # a repeated string in another context
+        else:
+            words = rng.choices(WORDS, k=rng.randint(2, 14))
+            if rng.random() < 0.15:
+                words.insert(rng.randrange(len(words)), rng.choice(["%s", "%d", "%1$s", "{0}", "<strong>", "[gallery]"]))
+            msgid = " ".join(words).capitalize() + f" {idx}"
+            msgctxt = None
+            seen.append(msgid)
+        entry = polib.POEntry(msgid=msgid, msgstr="", occurrences=[(f"includes/file-{idx % 50}.php", str(idx))])
+        if msgctxt:
+            entry.msgctxt = msgctxt
+        po.append(entry)
+    po.save(path)
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+async def run_case(args: argparse.Namespace) -> dict:
+    """Translate one catalog and measure it; runs in the child interpreter."""
+    rate_limiter = AdaptiveRateLimiter(initial_rate=args.rate, max_rate=args.rate, burst=args.concurrency)
+    api = APIManager(args.service, "bench-key", connection_limit=args.concurrency, rate_limiter=rate_limiter, base_url=args.base_url)
+    model = APIModels.get_models(args.service)[0][1]
+    started = time.perf_counter()
+    async with api:
+        engine = TranslationEngine(
+            args.case, "fa", api, model, translate_placeholders=True, concurrency=args.concurrency,
+            batch_size=args.batch_size, output_dir=args.output_dir, verbose=False, hedge_budget=args.hedge
+        )
+        _, translated = await engine.run()
+    elapsed = time.perf_counter() - started
+    stats = engine.telemetry.snapshot()
+    return {
+        "service": args.service,
+        "entries": sum(catalog.total for catalog in engine.catalogs),
+        "translated": translated,
+        "failed": len(engine.failed_entries),
+        "seconds": round(elapsed, 2),
+        "entries_per_second": round(stats["done"] / elapsed, 1) if elapsed else 0.0,
+        "requests": stats["requests"],
+        "retries": stats["retries"],
+        "latency_p50": stats["latency"]["p50"],
+        "latency_p99": stats["latency"]["p99"],
+        "queue_wait_p50": stats["queue_wait"]["p50"],
+        "hedged": stats["hedged"],
+        "hedge_saved": stats["hedge_saved"],
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def case_command(args: argparse.Namespace, path: str, service: str, url: str, output_dir: str) -> List[str]:
+    return [sys.executable, "-m", "benchmarks.bench", "--case", path, "--service", service, "--base-url", url,
+            "--output-dir", output_dir, "--concurrency", str(args.concurrency), "--batch-size", str(args.batch_size),
+            "--rate", str(args.rate), "--hedge", str(args.hedge)]
+
+def start_server(args: argparse.Namespace) -> int:
+    """Run the mock server on a daemon thread with its own event loop; returns its port."""
+    ready = threading.Event()
+    port: Dict[str, int] = {}
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        port["value"] = loop.run_until_complete(MockLLM(settings_from(args)).start(port=args.port))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return port["value"]
+
+def print_table(results: List[dict]):
+    columns = ["service", "entries", "seconds", "entries_per_second", "latency_p50", "latency_p99", "requests", "retries", "peak_rss_mb"]
+    widths = [max(len(column), *(len(str(result.get(column))) for result in results)) for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result.get(column)).ljust(width) for column, width in zip(columns, widths)))
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Cases whose throughput dropped more than `tolerance` below the baseline."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(item["service"], item["entries"]): item for item in json.load(f)}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["service"], result["entries"]))
+        if before and result["entries_per_second"] < before["entries_per_second"] * (1 - tolerance):
+            regressions.append(f"{result['service']} {result['entries']} entries: {result['entries_per_second']} entries/s "
+                               f"vs {before['entries_per_second']} in the baseline")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the translation engine against a local mock LLM.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--services", default="openrouter,gemini", help="comma-separated services to simulate")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=500.0, help="client rate limit in requests per second")
+    parser.add_argument("--hedge", type=float, default=0.0, metavar="BUDGET", help="hedge slow requests with this budget (0 disables)")
+    parser.add_argument("--port", type=int, default=0, help="mock server port (0 picks a free one)")
+    parser.add_argument("--workdir", default="", help="keep generated catalogs here instead of a temporary directory")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per case")
+    parser.add_argument("--save", default="", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", default="", metavar="PATH", help="fail if throughput regressed against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed throughput drop for --compare")
+    add_arguments(parser)
+    # Internal: run a single case in this process.
+    parser.add_argument("--case", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--service", default="openrouter", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", default="", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", default="", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.case:
+        print(json.dumps(asyncio.run(run_case(args))), flush=True)
+        return 0
+
+    port = start_server(args)
+    results: List[dict] = []
+    with tempfile.TemporaryDirectory() as scratch:
+        workdir = args.workdir or scratch
+        os.makedirs(workdir, exist_ok=True)
+        for size in (int(size) for size in args.sizes.split(",") if size):
+            path = os.path.join(workdir, f"bench_{size}.po")
+            if not os.path.exists(path):
+                synthetic_catalog(path, size, args.seed)
+            for service in (service for service in args.services.split(",") if service):
+                output_dir = tempfile.mkdtemp(dir=scratch)
+                completed = subprocess.run(case_command(args, path, service, base_url(service, port), output_dir),
+                                           capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                if completed.returncode != 0:
+                    print(completed.stderr, file=sys.stderr)
+                    return 1
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                results.append(result)
+                if args.json:
+                    print(json.dumps(result), flush=True)
+    if not args.json:
+        print_table(results)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Local stand-in for the OpenRouter and Gemini endpoints the translator calls.
+
+Serves POST /v1/chat/completions (OpenRouter) and POST /v1beta/models/<model>:generateContent
+(Gemini), both also as server-sent events (OpenRouter's "stream": true, Gemini's
+:streamGenerateContent?alt=sse). Every answer "translates" by prefixing each string with the language name, keeping the
+<xN/> placeholder tokens intact, and reports token usage like the real services. Latency,
+the share of 500 errors, the share of 429s (with Retry-After), the share of very slow
+requests and the share of streamed answers that never stop (runaway generations) are
+configurable, as are the stream's own failure modes: keep-alive comments before the first
+token, a pause after it and error events in the middle of an answer.
+
+Run standalone:
+    python -m benchmarks.mock_llm --port 8799 --latency 0.2 --error-rate 0.01 --throttle-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+from aiohttp import web
+
+@dataclass
+class MockSettings:
+    latency: float = 0.05
+    jitter: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: Optional[int] = None
+    runaway_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    first_token_delay: float = 0.0
+    stall: float = 0.0
+    stream_error_rate: float = 0.0
+
+class MockLLM:
+    STREAM_CHUNK = 16
+    RUNAWAY_CHUNKS = 100000
+    KEEPALIVE_INTERVAL = 0.05
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.random = random.Random(settings.seed)
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.runaways = 0
+        self.hung_up = 0
+        self.stream_errors = 0
+        self.app = web.Application()
+        self.app.router.add_post("/v1/chat/completions", self.openrouter)
+        self.app.router.add_post("/v1beta/models/{model}", self.gemini)
+        self.app.router.add_get("/v1/health", self.health)
+        self.app.router.add_get("/v1beta/models", self.health)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving; returns the bound port (pass 0 to pick a free one)."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def _delay_or_fail(self) -> Optional[web.Response]:
+        settings = self.settings
+        self.requests += 1
+        latency = settings.latency * (1 + self.random.uniform(-settings.jitter, settings.jitter))
+        if self.random.random() < settings.slow_rate:
+            # A request stuck in a provider queue, the tail hedging is meant for.
+            latency = settings.slow_latency
+        await asyncio.sleep(max(0.0, latency))
+        roll = self.random.random()
+        if roll < settings.throttle_rate:
+            self.throttled += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": str(settings.retry_after)})
+        if roll < settings.throttle_rate + settings.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "upstream failure"}, status=500)
+        return None
+
+    @staticmethod
+    def _item(language: str, value):
+        """A plain string, or an object item of a plural/msgctxt entry (a list of forms for plurals)."""
+        if isinstance(value, str):
+            return f"{language}: {value}"
+        if value.get("plural"):
+            return [f"{language}: {value['text']}"] + [f"{language}: {value['plural']}"] * (value["forms"] - 1)
+        return f"{language}: {value['text']}"
+
+    @staticmethod
+    def _answer(prompt: str) -> Tuple[str, int, int]:
+        """(answer text, prompt tokens, completion tokens) for a single or batched prompt."""
+        # A plain "Persian: " prefix; anything bracketed would read as a shortcode placeholder.
+        language = prompt.split(" into ", 1)[1].split(" ", 1)[0] if " into " in prompt else "Translated"
+        text = prompt.split("Input: ", 1)[1] if "Input: " in prompt else prompt
+        try:
+            strings = json.loads(text)
+        except ValueError:
+            strings = None
+        if isinstance(strings, dict):
+            answer = json.dumps({key: MockLLM._item(language, value) for key, value in strings.items()}, ensure_ascii=False)
+        else:
+            answer = f"{language}: {text}"
+        return answer, len(prompt.encode("utf-8")) // 4 + 1, len(answer.encode("utf-8")) // 4 + 1
+
+    async def openrouter(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        failure = await self._delay_or_fail()
+        if failure is not None:
+            return failure
+        answer, prompt_tokens, completion_tokens = self._answer(body["messages"][0]["content"])
+        if body.get("stream"):
+            return await self._stream(request, answer, lambda text: {"choices": [{"delta": {"content": text}}]},
+                                      {"choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}}, done=True)
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant", "content": answer}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+        })
+
+    async def gemini(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        failure = await self._delay_or_fail()
+        if failure is not None:
+            return failure
+        answer, prompt_tokens, completion_tokens = self._answer(body["contents"][0]["parts"][0]["text"])
+        if request.match_info["model"].endswith(":streamGenerateContent"):
+            usage = {"usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens}}
+            return await self._stream(request, answer, lambda text: {"candidates": [{"content": {"parts": [{"text": text}]}}]},
+                                      {"candidates": [{"content": {"parts": []}, "finishReason": "STOP"}], **usage}, done=False)
+        return web.json_response({
+            "candidates": [{"content": {"parts": [{"text": answer}]}}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens}
+        })
+
+    async def _stream(self, request: web.Request, answer: str, event: Callable[[str], dict], last: dict, done: bool) -> web.StreamResponse:
+        """Send the answer as SSE events of STREAM_CHUNK characters; a runaway answer repeats until the client hangs up."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+
+        async def send(data: dict):
+            await response.write(f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        chunks = [answer[i:i + self.STREAM_CHUNK] for i in range(0, len(answer), self.STREAM_CHUNK)]
+        try:
+            await response.prepare(request)
+            await response.write(b": PROCESSING\n\n")
+            # Providers keep a queued request's connection open with comments until the first token.
+            waited = 0.0
+            while waited < self.settings.first_token_delay:
+                step = min(self.KEEPALIVE_INTERVAL, self.settings.first_token_delay - waited)
+                await asyncio.sleep(step)
+                waited += step
+                await response.write(b": PROCESSING\n\n")
+            if self.random.random() < self.settings.stream_error_rate:
+                self.stream_errors += 1
+                await send(event(chunks[0]))
+                await send({"error": {"code": 502, "message": "upstream connection lost"}})
+                await response.write_eof()
+                return response
+            if self.random.random() < self.settings.runaway_rate:
+                self.runaways += 1
+                for i in range(self.RUNAWAY_CHUNKS):
+                    await send(event(chunks[i % len(chunks)]))
+                    await asyncio.sleep(0.001)
+            for i, chunk in enumerate(chunks):
+                await send(event(chunk))
+                if i == 0 and self.settings.stall:
+                    await asyncio.sleep(self.settings.stall)
+            await send(last)
+            if done:
+                await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            # The client cut the answer off; that is the point of the runaway case.
+            self.hung_up += 1
+        return response
+
+def base_url(service: str, port: int) -> str:
+    return f"http://127.0.0.1:{port}/{'v1' if service == 'openrouter' else 'v1beta'}/"
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency varies by +/- this fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--runaway-rate", type=float, default=0.0, help="share of streamed answers that repeat until the client disconnects")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests that take --slow-latency seconds")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="seconds a slow request takes")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="seconds of keep-alive comments before a streamed answer's first token")
+    parser.add_argument("--stall", type=float, default=0.0, help="seconds a streamed answer pauses after its first chunk")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="share of streamed answers that end in an error event")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for latency and failures")
+
+def settings_from(args: argparse.Namespace) -> MockSettings:
+    return MockSettings(args.latency, args.jitter, args.error_rate, args.throttle_rate, args.retry_after, args.seed, args.runaway_rate,
+                        args.slow_rate, args.slow_latency, args.first_token_delay, args.stall, args.stream_error_rate)
+
+async def serve(settings: MockSettings, port: int):
+    server = MockLLM(settings)
+    port = await server.start(port=port)
+    print(f"Mock LLM listening on {base_url('openrouter', port)} and {base_url('gemini', port)}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fake OpenRouter/Gemini endpoints for benchmarks.")
+    parser.add_argument("--port", type=int, default=8799)
+    add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(settings_from(args), args.port))
+    except KeyboardInterrupt:
+        pass
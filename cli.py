@@ -0,0 +1,212 @@
+"""Headless batch translation of .po/.pot files; does not import PySide6.
+
+All files are translated as one project: their untranslated entries share a single
+deduplicated work queue and pool of workers.
+
+Example:
+    PO_TRANSLATOR_API_KEY=... python cli.py --service openrouter --lang fa "languages/*.po" --json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Union
+from core.api_manager import APIManager
+from core.engine import Catalog, TranslationEngine
+from core.provider_pool import ProviderPool
+from core.translation_memory import TranslationMemory
+from core.glossary import Glossary
+from core.delta import PreviousCatalog
+from models.api_models import APIModels
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Translate .po files without the GUI.")
+    parser.add_argument("inputs", nargs="+", help=".po/.pot files or glob patterns (use ** for recursive matches)")
+    parser.add_argument("--service", choices=["openrouter", "gemini"], default="openrouter")
+    parser.add_argument("--model", default="", help="model id or display name (default: first model of the service)")
+    parser.add_argument("--lang", choices=sorted(APIManager.LANGUAGES), default="fa", help="target language")
+    parser.add_argument("--api-key", default=os.environ.get("PO_TRANSLATOR_API_KEY", ""), help="defaults to $PO_TRANSLATOR_API_KEY")
+    parser.add_argument("--provider", action="append", default=[], metavar="SERVICE:MODEL",
+                        help="load-balance over several providers (repeatable; SERVICE:* means every model of the service)")
+    parser.add_argument("--key", action="append", default=[], metavar="SERVICE=KEY",
+                        help="API key per service for --provider (defaults to $PO_TRANSLATOR_<SERVICE>_KEY)")
+    parser.add_argument("--context", default="", help="free-form context added to every prompt")
+    parser.add_argument("--glossary", action="append", default=[], metavar="PATH",
+                        help="terminology as .csv (source,target[,note]) or .tbx (repeatable; later files override earlier ones)")
+    parser.add_argument("--overwrite", action="store_true", help="re-translate entries that already have a msgstr")
+    parser.add_argument("--skip-placeholders", action="store_true", help="leave strings containing variables untranslated")
+    # Strings with variables are translated by default now; kept so existing scripts still run.
+    parser.add_argument("--translate-placeholders", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--concurrency", type=int, default=16, help="workers (requests in flight) shared by all files")
+    parser.add_argument("--batch-size", type=int, default=20, help="strings per request (1 disables batching)")
+    parser.add_argument("--output-dir", default="", help="write <name>_translated.po here instead of next to the input, keeping the inputs' relative folders")
+    parser.add_argument("--mo", action="store_true", help="also compile <name>_translated.mo next to each output")
+    parser.add_argument("--fuzzy", type=float, default=0.0, metavar="SIMILARITY",
+                        help="pre-fill entries from earlier translations at least this similar (0-1) and mark them fuzzy; 0 disables")
+    parser.add_argument("--fuzzy-hints", type=float, default=0.0, metavar="SIMILARITY",
+                        help="send earlier translations at least this similar (0-1) along as a hint; 0 disables")
+    parser.add_argument("--previous", action="append", default=[], metavar="PATH",
+                        help="delta mode: carry translations of this earlier .po over to the inputs and translate only new or changed entries (repeatable)")
+    parser.add_argument("--delta-similarity", type=float, default=PreviousCatalog.SIMILARITY, metavar="SIMILARITY",
+                        help="with --previous, edited entries at least this similar (0-1) keep their old translation marked fuzzy")
+    parser.add_argument("--memory", default="", help="translation memory database (default: next to the app's settings)")
+    parser.add_argument("--no-memory", action="store_true", help="do not read or write the translation memory")
+    parser.add_argument("--proxy", action="store_true", help="route requests through the configured proxy")
+    parser.add_argument("--base-url", default="", help="API root for --service, e.g. a self-hosted gateway (ignored with --provider)")
+    parser.add_argument("--no-stream", action="store_true", help="wait for whole answers instead of streaming them")
+    parser.add_argument("--first-byte-timeout", type=float, default=20.0, metavar="SECONDS",
+                        help="give up on a request whose answer has not started within this time")
+    parser.add_argument("--idle-timeout", type=float, default=10.0, metavar="SECONDS",
+                        help="give up on a streamed answer that stalls this long between tokens")
+    parser.add_argument("--check-processes", type=int, default=0, metavar="N",
+                        help="validate translations on N worker processes instead of a thread (0 = thread)")
+    parser.add_argument("--hedge", type=float, default=0.0, metavar="BUDGET",
+                        help="send a backup copy of unusually slow requests, at most BUDGET extra requests per request (e.g. 0.1); 0 disables")
+    parser.add_argument("--hedge-percentile", type=float, default=0.95, metavar="Q",
+                        help="a request gets a backup once it is slower than this share of recent ones")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON lines on stdout")
+    parser.add_argument("--telemetry", default="", metavar="PATH", help="write run statistics to PATH (.json or .csv)")
+    parser.add_argument("--verbose", action="store_true", help="also print per-entry log messages")
+    return parser.parse_args(argv)
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    files: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [path for path in sorted(glob.glob(pattern, recursive=True)) if not path.endswith("_translated.po")]
+        else:
+            matches = [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+def resolve_model(service: str, model: str) -> str:
+    models = APIModels.get_models(service)
+    for name, model_id in models:
+        if model in (name, model_id):
+            return model_id
+    return model or models[0][1]
+
+def build_api(args: argparse.Namespace) -> Union[APIManager, ProviderPool]:
+    connection_limit = max(1, args.concurrency)
+    options = {"stream": not args.no_stream, "first_byte_timeout": args.first_byte_timeout, "idle_timeout": args.idle_timeout}
+    if not args.provider:
+        return APIManager(args.service, args.api_key, args.proxy, connection_limit=connection_limit, base_url=args.base_url, **options)
+    keys = {service: os.environ.get(f"PO_TRANSLATOR_{service.upper()}_KEY", "") for service in APIModels.MODELS}
+    keys[args.service] = args.api_key or keys[args.service]
+    keys.update(dict(item.split("=", 1) for item in args.key if "=" in item))
+    models: Dict[str, List[str]] = {}
+    for provider in args.provider:
+        service, _, model = provider.partition(":")
+        models.setdefault(service, [])
+        if model and model != "*":
+            models[service].append(resolve_model(service, model))
+    missing = [service for service in models if not keys.get(service)]
+    if missing:
+        raise ValueError(f"No API key for {', '.join(missing)}")
+    return ProviderPool.from_keys({service: keys[service] for service in models}, models, args.proxy, connection_limit, **options)
+
+class Reporter:
+    """Prints events either as JSON lines or as short human-readable lines."""
+
+    def __init__(self, as_json: bool, verbose: bool):
+        self.as_json = as_json
+        self.verbose = verbose
+        self._last_percent = -1
+
+    def event(self, kind: str, **fields):
+        if self.as_json:
+            print(json.dumps({"event": kind, **fields}, ensure_ascii=False), flush=True)
+        elif kind == "log":
+            print(fields["message"], file=sys.stderr, flush=True)
+        elif kind == "progress":
+            print(f"{fields['percent']}%", file=sys.stderr, flush=True)
+        else:
+            print(" ".join(f"{key}={value}" for key, value in {"event": kind, **fields}.items()), flush=True)
+
+    def log(self, message: str):
+        if self.verbose:
+            self.event("log", message=message)
+
+    def progress(self, percent: int):
+        if self._last_percent != percent:
+            self._last_percent = percent
+            self.event("progress", percent=percent)
+
+async def translate_files(args: argparse.Namespace, files: List[str], reporter: Reporter) -> bool:
+    api = build_api(args)
+    model = api.model_id if isinstance(api, ProviderPool) else resolve_model(args.service, args.model)
+    glossary = Glossary.load(args.glossary, args.lang) if args.glossary else None
+    memory = None if args.no_memory else TranslationMemory(args.memory, prompt_version=APIManager.PROMPT_VERSION)
+    started = time.monotonic()
+
+    def file_done(catalog: Catalog):
+        reporter.event("done", file=catalog.file_path, output=catalog.output_file, translated=catalog.translated,
+                       failed=catalog.failed, seconds=round(time.monotonic() - started, 2))
+
+    async with api:
+        engine = TranslationEngine(
+            files, args.lang, api, model, args.context, args.overwrite, not args.skip_placeholders,
+            concurrency=args.concurrency, batch_size=args.batch_size, memory=memory, output_dir=args.output_dir,
+            compile_mo=args.mo, verbose=args.verbose, glossary=glossary, fuzzy_threshold=args.fuzzy, fuzzy_hint_threshold=args.fuzzy_hints,
+            previous_files=args.previous, delta_similarity=args.delta_similarity,
+            check_processes=args.check_processes, hedge_budget=args.hedge, hedge_percentile=args.hedge_percentile, on_log=reporter.log, on_progress=reporter.progress, on_file_done=file_done
+        )
+        try:
+            output_files, translated = await engine.run()
+        finally:
+            if memory:
+                memory.close()
+
+    summary = {"files": len(files), "saved": len(output_files), "translated": translated,
+               "failed": len(engine.failed_entries), "seconds": round(time.monotonic() - started, 2)}
+    if memory:
+        summary.update(memory_hits=memory.hits, memory_misses=memory.misses)
+    stats = engine.telemetry.snapshot()
+    summary.update(requests=stats["requests"], retries=stats["retries"], entries_per_second=stats["entries_per_second"],
+                   latency_p50=stats["latency"]["p50"], latency_p99=stats["latency"]["p99"],
+                   prompt_tokens=stats["prompt_tokens"], completion_tokens=stats["completion_tokens"])
+    summary.update(check_issues=stats["check_issues"], check_p50=stats["check"]["p50"], check_wait_p50=stats["check_wait"]["p50"])
+    if args.hedge:
+        summary.update(hedged=stats["hedged"], hedge_wins=stats["hedge_wins"], hedge_saved=stats["hedge_saved"])
+    if not args.no_stream:
+        summary.update(first_token_p50=stats["first_token"]["p50"], cut_off=stats["cut_off"])
+    if glossary:
+        summary.update(glossary_violations=len(engine.glossary_violations))
+    if args.fuzzy or args.fuzzy_hints:
+        summary.update(fuzzy_prefilled=stats["fuzzy_prefilled"], fuzzy_hints=stats["fuzzy_hints"])
+    if args.previous:
+        summary.update(delta_carried=stats["delta_carried"], delta_fuzzy=stats["delta_fuzzy"])
+    if args.telemetry:
+        engine.telemetry.export(args.telemetry)
+    if isinstance(api, ProviderPool):
+        summary.update(providers=api.stats())
+    reporter.event("summary", **summary)
+    return len(output_files) == len(files) and not engine.failed_entries
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No input files matched", file=sys.stderr)
+        return 2
+    if not args.api_key and not args.provider:
+        print("An API key is required (--api-key or PO_TRANSLATOR_API_KEY)", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    try:
+        return 0 if asyncio.run(translate_files(args, files, Reporter(args.json, args.verbose))) else 1
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("Interrupted; finished entries are kept in the journal for the next run", file=sys.stderr)
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,28 @@
 import aiohttp
 import asyncio
-import re
-from typing import Tuple, List, Dict
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Tuple, List, Dict, NamedTuple, Optional, Sequence, Union
+from core.rate_limiter import AdaptiveRateLimiter
+from core import placeholders
+from core.telemetry import Telemetry
+
+class TranslationError(Exception):
+    """A request that could not produce a usable translation; the message is the reason shown to the user."""
+
+class OutputTooLong(TranslationError):
+    """A streamed answer that ran past the length its source allows and was cut off."""
+
+class Segment(NamedTuple):
+    """A batch item with more than a string: its msgctxt, or a plural entry answered with `forms` strings chosen by `rule`."""
+    text: str
+    context: str = ""
+    plural: str = ""
+    forms: int = 0
+    rule: str = ""
 
 class APIManager:
     BASE_URLS = {
@@ -20,8 +41,17 @@ class APIManager:
         ]
     }
 
-    def __init__(self, service: str, api_key: str, use_proxy: bool = False):
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # A translation longer than this many times its source (plus slack) is a runaway generation.
+    LENGTH_FACTOR = 3
+    LENGTH_SLACK = 200
+
+    def __init__(self, service: str, api_key: str, use_proxy: bool = False, connection_limit: int = 32,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, max_retries: int = 4, base_url: str = "",
+                 stream: bool = True, first_byte_timeout: float = 20.0, idle_timeout: float = 10.0):
         self.service = service.lower()
+        # A self-hosted gateway or the benchmark's mock server can stand in for the public endpoint.
+        self.base_url = (base_url or self.BASE_URLS[self.service]).rstrip("/") + "/"
         self.api_key = api_key.strip()
         self.proxies = {"https": "https://middleman.yebekhe.workers.dev"} if use_proxy else None
         self.headers = {
@@ -30,63 +60,338 @@ class APIManager:
             "HTTP-Referer": "https://myapp.example.com",
             "X-Title": "TranslatorApp"
         }
+        self.connection_limit = connection_limit
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        # Streaming answers arrive token by token: the first must come within first_byte_timeout,
+        # each later one within idle_timeout of the previous, however long the whole answer takes.
+        self.stream = stream
+        self.first_byte_timeout = first_byte_timeout
+        self.idle_timeout = idle_timeout
+        self.telemetry: Optional[Telemetry] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self) -> aiohttp.ClientSession:
+        """Create the shared session; safe to call repeatedly."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self) -> "APIManager":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     async def validate_api_key(self) -> Tuple[bool, str]:
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.BASE_URLS[self.service]}{'health' if self.service == 'openrouter' else f'models?key={self.api_key}'}"
+        session = await self.open()
+        url = f"{self.base_url}{'health' if self.service == 'openrouter' else f'models?key={self.api_key}'}"
+        try:
+            async with session.get(url, headers=self.headers if self.service == "openrouter" else {}, proxy=self.proxies["https"] if self.proxies else None, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                response.raise_for_status()
+                return True, "API key valid"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return False, f"Invalid API key: {str(e)}"
+
+    LANGUAGES = {"en": "English", "fa": "Persian", "ar": "Arabic"}
+    PROMPT_TEMPLATE = (
+        "Translate the text into {language} for a WordPress plugin UI:\n"
+        "1. Return only the translated string.\n"
+        "2. Keep every <x1/>, <x2/>, ... token exactly as written; move it only where the sentence needs it.\n"
+        "3. Use standard WordPress UI terms.\n"
+        "4. Ensure concise, natural translations.\n"
+        "{notes}Context: {context}\nInput: {text}"
+    )
+    BATCH_PROMPT_TEMPLATE = (
+        "Translate each numbered string into {language} for a WordPress plugin UI:\n"
+        "1. Return only a JSON object mapping every number to its translated string, e.g. {{\"1\": \"...\"}}.\n"
+        "2. Keep every <x1/>, <x2/>, ... token exactly as written; move it only where the sentence needs it.\n"
+        "3. Use standard WordPress UI terms.\n"
+        "4. Ensure concise, natural translations.\n"
+        "5. An object item is translated from its \"text\"; its \"context\" only tells which meaning is meant. "
+        "If it has a \"plural\", answer with a JSON list of exactly \"forms\" strings, where string i is used for the counts n that \"rule\" maps to i.\n"
+        "{notes}Context: {context}\nInput: {text}"
+    )
+    GLOSSARY_LINE = "Glossary, translate these terms exactly as given: {terms}.\n"
+    HINTS_LINE = "Similar strings translated before, reuse their wording where it fits: {hints}.\n"
+    MSGCTXT_LINE = "The string is used as: {msgctxt} (this note tells which meaning is meant and is not translated).\n"
+    # Cached translations are only reused while the prompts that produced them are unchanged.
+    PROMPT_VERSION = hashlib.sha1((PROMPT_TEMPLATE + BATCH_PROMPT_TEMPLATE + GLOSSARY_LINE + HINTS_LINE + MSGCTXT_LINE).encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def _notes(cls, glossary: Sequence[Tuple[str, str]], hints: Sequence[Tuple[str, str]], msgctxt: str = "") -> str:
+        """Prompt lines for the glossary terms, fuzzy-match hints and msgctxt of the request, or nothing."""
+        def pairs(items: Sequence[Tuple[str, str]]) -> str:
+            return "; ".join(f'"{source}" = "{target}"' for source, target in items)
+        return ((cls.GLOSSARY_LINE.format(terms=pairs(glossary)) if glossary else "")
+                + (cls.HINTS_LINE.format(hints=pairs(hints)) if hints else "")
+                + (cls.MSGCTXT_LINE.format(msgctxt=msgctxt) if msgctxt else ""))
+
+    def _needs_translation(self, text: str, target_lang: str) -> bool:
+        return len(text.strip()) >= 3 and target_lang in self.LANGUAGES and placeholders.has_text(text)
+
+    def _build_request(self, prompt: str, model: str, temperature: float, top_p: float, max_output_tokens: int) -> Tuple[str, dict, dict]:
+        if self.service == "openrouter":
+            url = f"{self.base_url}chat/completions"
+            data = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "top_p": top_p,
+                "max_tokens": max_output_tokens
+            }
+            if self.stream:
+                data["stream"] = True
+            return url, data, self.headers
+        if self.stream:
+            url = f"{self.base_url}models/{model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        else:
+            url = f"{self.base_url}models/{model}:generateContent?key={self.api_key}"
+        data = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": temperature, "topP": top_p, "maxOutputTokens": max_output_tokens}
+        }
+        return url, data, {"Content-Type": "application/json"}
+
+    def _usage(self, response_json: dict) -> Optional[Tuple[int, int]]:
+        """(prompt_tokens, completion_tokens) from the response's usage block, if it has one."""
+        try:
+            if self.service == "openrouter":
+                usage = response_json["usage"]
+                return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+            usage = response_json["usageMetadata"]
+            return int(usage.get("promptTokenCount", 0)), int(usage.get("candidatesTokenCount", 0))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+    def _content(self, response_json: dict) -> str:
+        """The answer text of a response, or of one streamed event; raises KeyError/IndexError/TypeError when it has none."""
+        if self.service == "openrouter":
+            choice = response_json["choices"][0]
+            return (choice["delta"] if self.stream else choice["message"]).get("content") or ""
+        return "".join(part.get("text", "") for part in response_json["candidates"][0]["content"]["parts"])
+
+    def _length_limit(self, text: str) -> int:
+        return len(text) * self.LENGTH_FACTOR + self.LENGTH_SLACK
+
+    async def _read_stream(self, response: aiohttp.ClientResponse, max_chars: int, started: float) -> Tuple[str, Optional[Tuple[int, int]]]:
+        """Assemble a server-sent-events answer; returns (text, usage).
+
+        Raises asyncio.TimeoutError when the first token or the next one is late and
+        OutputTooLong as soon as the text passes max_chars, which drops the connection
+        and with it the rest of the generation.
+        """
+        parts: List[str] = []
+        length = 0
+        usage = None
+        # Keep-alive comments do not count as the first byte; only answer text does.
+        deadline = started + self.first_byte_timeout
+        while True:
+            timeout = deadline - time.monotonic() if not parts else self.idle_timeout
+            line = await asyncio.wait_for(response.content.readline(), max(0.0, timeout))
+            if not line:
+                break
+            line = line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
             try:
-                async with session.get(url, headers=self.headers if self.service == "openrouter" else {}, proxy=self.proxies["https"] if self.proxies else None, timeout=10) as response:
-                    response.raise_for_status()
-                    return True, "API key valid"
-            except aiohttp.ClientError as e:
-                return False, f"Invalid API key: {str(e)}"
-
-    async def translate_text(self, text: str, target_lang: str, model: str, context: str = "", temperature: float = 0.7, top_p: float = 0.95, top_k: int = 40, max_output_tokens: int = 2048) -> str:
-        if not text.strip() or len(text.strip()) < 3:
-            return text
-        if target_lang not in ["en", "fa", "ar"]:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            if "error" in event:
+                raise aiohttp.ClientPayloadError(f"stream error: {json.dumps(event['error'])[:200]}")
+            usage = self._usage(event) or usage
+            try:
+                text = self._content(event)
+            except (KeyError, IndexError, TypeError, AttributeError):
+                continue
+            if text:
+                if not parts and self.telemetry:
+                    self.telemetry.first_token.add(time.monotonic() - started)
+                parts.append(text)
+                length += len(text)
+                if max_chars and length > max_chars:
+                    raise OutputTooLong(f"Answer cut off after {length} characters (at most {max_chars} expected)")
+        if not parts:
+            raise aiohttp.ClientPayloadError("stream ended without an answer")
+        return "".join(parts).strip(), usage
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                return None
+
+    async def _complete(self, prompt: str, model: str, temperature: float, top_p: float, max_output_tokens: int, max_chars: int = 0) -> str:
+        """POST a prompt, retrying throttled and transient failures; raises TranslationError once retries run out.
+
+        When streaming, an answer longer than max_chars is cut off with OutputTooLong, which is not retried.
+        """
+        session = await self.open()
+        url, data, headers = self._build_request(prompt, model, temperature, top_p, max_output_tokens)
+        key = (self.service, model)
+        reason = ""
+        telemetry = self.telemetry
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.rate_limiter.backoff(attempt))
+            waited = time.monotonic()
+            await self.rate_limiter.acquire(key)
+            started = time.monotonic()
+            if telemetry:
+                telemetry.limiter_wait.add(started - waited)
+            try:
+                # No total timeout: a long answer may take as long as it needs while tokens keep coming.
+                request = session.post(url, json=data, headers=headers, proxy=self.proxies["https"] if self.proxies else None,
+                                       timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.first_byte_timeout))
+                response = await asyncio.wait_for(request, self.first_byte_timeout)
+                async with response:
+                    if response.status in self.RETRY_STATUSES:
+                        reason = f"HTTP {response.status} {response.reason or ''}".strip()
+                        throttled = response.status in (429, 503)
+                        if throttled:
+                            self.rate_limiter.on_throttle(key, self._retry_after(response))
+                        if telemetry:
+                            telemetry.record_request(model, time.monotonic() - started, False)
+                            if attempt < self.max_retries:
+                                telemetry.record_retry(throttled)
+                        continue
+                    if response.status >= 400:
+                        if telemetry:
+                            telemetry.record_request(model, time.monotonic() - started, False)
+                        raise TranslationError(f"HTTP {response.status}: {(await response.text())[:200]}")
+                    if self.stream:
+                        content, usage = await self._read_stream(response, max_chars, started)
+                    else:
+                        # Nothing arrives before the whole answer is generated: headers and body share the first-byte bound.
+                        remaining = started + self.first_byte_timeout - time.monotonic()
+                        response_json = await asyncio.wait_for(response.json(content_type=None), max(0.0, remaining))
+            except OutputTooLong:
+                self.rate_limiter.on_success(key)
+                if telemetry:
+                    telemetry.record_request(model, time.monotonic() - started, False)
+                    telemetry.cut_off += 1
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                reason = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                if telemetry:
+                    telemetry.record_request(model, time.monotonic() - started, False)
+                    if attempt < self.max_retries:
+                        telemetry.record_retry()
+                continue
+            self.rate_limiter.on_success(key)
+            if self.stream:
+                if telemetry:
+                    telemetry.record_request(model, time.monotonic() - started, True, usage)
+                return content
+            if telemetry:
+                telemetry.record_request(model, time.monotonic() - started, True, self._usage(response_json))
+            try:
+                return self._content(response_json).strip()
+            except (KeyError, IndexError, TypeError, AttributeError):
+                raise TranslationError(f"Unexpected response: {json.dumps(response_json)[:200]}")
+        raise TranslationError(f"{reason} after {self.max_retries + 1} attempts")
+
+    async def translate_text(self, text: str, target_lang: str, model: str, context: str = "", temperature: float = 0.7, top_p: float = 0.95, top_k: int = 40, max_output_tokens: int = 2048,
+                             glossary: Sequence[Tuple[str, str]] = (), hints: Sequence[Tuple[str, str]] = (), msgctxt: str = "") -> str:
+        if not self._needs_translation(text, target_lang):
             return text
 
-        lang_map = {"en": "English", "fa": "Persian", "ar": "Arabic"}
-        prompt = (
-            f"Translate the text into {lang_map[target_lang]} for a WordPress plugin UI:\n"
-            f"1. Return only the translated string.\n"
-            f"2. Preserve placeholders (e.g., %s, %d, {{0}}, <tag>, [shortcode]).\n"
-            f"3. Use standard WordPress UI terms.\n"
-            f"4. Ensure concise, natural translations.\n"
-            f"Context: {context or 'WordPress plugin UI'}\nInput: {text}"
-        )
-
-        async with aiohttp.ClientSession() as session:
-            if self.service == "openrouter":
-                url = f"{self.BASE_URLS['openrouter']}chat/completions"
-                data = {
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature,
-                    "top_p": top_p,
-                    "max_tokens": max_output_tokens
-                }
-                headers = self.headers
+        masked, tokens = placeholders.mask(text)
+        prompt = self.PROMPT_TEMPLATE.format(language=self.LANGUAGES[target_lang], notes=self._notes(glossary, hints, msgctxt), context=context or "WordPress plugin UI", text=masked)
+        translated = await self._complete(prompt, model, temperature, top_p, max_output_tokens, self._length_limit(masked))
+        try:
+            return placeholders.unmask(translated, tokens)
+        except placeholders.PlaceholderError as e:
+            raise TranslationError(f"{str(e).capitalize()} in '{translated}'")
+
+    async def translate_batch(self, texts: Sequence[Union[str, Segment]], target_lang: str, model: str, context: str = "", temperature: float = 0.7, top_p: float = 0.95,
+                              max_output_tokens: int = 2048, glossary: Sequence[Tuple[str, str]] = (), hints: Sequence[Tuple[str, str]] = ()) -> List[Optional[Union[str, List[str]]]]:
+        """Translate several strings, or Segments carrying a msgctxt or plural, in one request.
+
+        Returns one item per input, a list of forms for a plural Segment; None marks an
+        entry whose answer was missing or failed validation, so the caller can retry it
+        on its own. Raises TranslationError when the request itself fails.
+        """
+        segments = [text if isinstance(text, Segment) else Segment(text) for text in texts]
+        results: List[Optional[Union[str, List[str]]]] = [None] * len(segments)
+        for idx, segment in enumerate(segments):
+            if not self._needs_translation(segment.plural or segment.text, target_lang):
+                results[idx] = [segment.text] + [segment.plural] * (segment.forms - 1) if segment.plural else segment.text
+        pending = {str(n): idx for n, idx in enumerate((i for i, r in enumerate(results) if r is None), 1)}
+        if not pending:
+            return results
+
+        payload = {}
+        masked: Dict[str, Tuple[List[str], bool]] = {}
+        for n, idx in pending.items():
+            segment = segments[idx]
+            if segment.plural:
+                # One numbering for both; the last form must keep every placeholder of the plural.
+                plural, tokens = placeholders.mask(segment.plural)
+                shared = len(tokens)
+                text, tokens = placeholders.mask(segment.text, tokens)
+                payload[n] = {"text": text, "plural": plural, "forms": segment.forms, "rule": segment.rule}
+                if segment.context:
+                    payload[n]["context"] = segment.context
+                masked[n] = (tokens, shared == len(tokens))
             else:
-                url = f"{self.BASE_URLS['gemini']}models/{model}:generateContent?key={self.api_key}"
-                data = {
-                    "contents": [{"parts": [{"text": prompt}]}],
-                    "generationConfig": {"temperature": temperature, "topP": top_p, "maxOutputTokens": max_output_tokens}
-                }
-                headers = {"Content-Type": "application/json"}
+                text, tokens = placeholders.mask(segment.text)
+                payload[n] = {"text": text, "context": segment.context} if segment.context else text
+                masked[n] = (tokens, True)
+        text = json.dumps(payload, ensure_ascii=False)
+        prompt = self.BATCH_PROMPT_TEMPLATE.format(language=self.LANGUAGES[target_lang], notes=self._notes(glossary, hints), context=context or "WordPress plugin UI", text=text)
+        try:
+            answer = self._parse_batch(await self._complete(prompt, model, temperature, top_p, max_output_tokens, self._length_limit(text)))
+        except OutputTooLong:
+            # Every entry is retried on its own, each with its own, tighter bound.
+            return results
 
+        for n, idx in pending.items():
+            translated, (tokens, strict) = answer.get(n), masked[n]
             try:
-                async with session.post(url, json=data, headers=headers, proxy=self.proxies["https"] if self.proxies else None, timeout=20) as response:
-                    response.raise_for_status()
-                    response_json = await response.json()
-                    translated = response_json["choices"][0]["message"]["content"].strip() if self.service == "openrouter" else response_json["candidates"][0]["content"]["parts"][0]["text"].strip()
-                    return self._validate_response(text, translated)
-            except aiohttp.ClientError:
-                return text
-
-    def _validate_response(self, original: str, translated: str) -> str:
-        placeholder_pattern = r'%[sd]|%[0-9]\$[sd]|\{[0-9]+\}|\{[^{}]*?\}|\<[^>]+?\>|\[[^\]]+?\]'
-        original_placeholders = re.findall(placeholder_pattern, original)
-        translated_placeholders = re.findall(placeholder_pattern, translated)
-        return translated if sorted(original_placeholders) == sorted(translated_placeholders) else original
\ No newline at end of file
+                if segments[idx].plural:
+                    forms = segments[idx].forms
+                    if isinstance(translated, list) and len(translated) == forms and all(isinstance(form, str) and form.strip() for form in translated):
+                        results[idx] = [placeholders.unmask(form.strip(), tokens, partial=not strict or i < forms - 1) for i, form in enumerate(translated)]
+                elif isinstance(translated, str) and translated.strip():
+                    results[idx] = placeholders.unmask(translated.strip(), tokens)
+            except placeholders.PlaceholderError:
+                pass
+        return results
+
+    @staticmethod
+    def _parse_batch(raw: str) -> Dict[str, object]:
+        start, end = raw.find("{"), raw.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            answer = json.loads(raw[start:end + 1])
+        except ValueError:
+            return {}
+        return {str(k): v for k, v in answer.items()} if isinstance(answer, dict) else {}
+
@@ -0,0 +1,90 @@
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+class TranslationJournal:
+    """Append-only JSON-lines journal of finished translations.
+
+    The first line identifies the run (source file, language, model); every later line is
+    one translated entry. Records are flushed and fsynced every `flush_every` records, and
+    by flush_if_due (which the engine calls periodically) once they are `flush_interval`
+    seconds old, so a crash loses at most that much work. A truncated final line from an
+    interrupted write is ignored on load.
+    """
+
+    def __init__(self, path: str, source: str, language: str, model: str, flush_every: int = 50, flush_interval: float = 2.0):
+        self.path = path
+        self.header = {"source": os.path.abspath(source), "language": language, "model": model}
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._file = None
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def path_for(output_file: str) -> str:
+        return output_file + ".journal"
+
+    def load(self) -> Dict[Tuple[str, str], str]:
+        """Return translations recorded by a previous run of the same job, keyed by (msgctxt, msgid)."""
+        restored: Dict[Tuple[str, str], str] = {}
+        if not os.path.exists(self.path):
+            return restored
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        try:
+            if not lines or json.loads(lines[0]) != self.header:
+                return restored
+        except ValueError:
+            return restored
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+                restored[(record["c"], record["i"])] = record["s"]
+            except (ValueError, KeyError, TypeError):
+                continue
+        return restored
+
+    def open(self, resume: bool):
+        if resume and os.path.exists(self.path):
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps(self.header) + "\n")
+            self.flush()
+
+    def record(self, msgid: str, msgctxt: Optional[str], msgstr: str):
+        if self._file is None:
+            return
+        self._file.write(json.dumps({"c": msgctxt or "", "i": msgid, "s": msgstr}, ensure_ascii=False) + "\n")
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush records written more than flush_interval seconds after the last flush."""
+        if self._unflushed and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Close and delete the journal once its translations are safely in the saved file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,52 @@
+"""Delta runs: carrying the translations of a previous catalog over to a new template.
+
+Like msgmerge, each entry of the new .pot is looked up by (msgctxt, msgid, msgid_plural)
+in a hash index of the previous .po. An unchanged entry keeps its translation (and its
+fuzzy flag), an entry whose source was only edited gets the old translation marked fuzzy
+with the old msgid as previous_msgid, and only the rest is sent for translation. Building
+the index and each lookup are constant time per entry, so a merge is linear in the size
+of both catalogs.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+import polib
+from core import po_stream
+from core.fuzzy_index import FuzzyIndex, FuzzyMatch
+
+class PreviousCatalog:
+    SIMILARITY = 0.8
+
+    def __init__(self, min_similarity: float = SIMILARITY):
+        self.min_similarity = min_similarity
+        self.exact: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        self.near = FuzzyIndex()
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    @classmethod
+    def load(cls, paths: Sequence[str], min_similarity: float = SIMILARITY) -> "PreviousCatalog":
+        """Index the translated entries of one or more .po files; later files override earlier ones."""
+        previous = cls(min_similarity)
+        for path in paths:
+            for entry in po_stream.POReader(path):
+                previous.add(entry)
+        return previous
+
+    def add(self, entry: polib.POEntry):
+        if entry.obsolete or not po_stream.has_translation(entry):
+            return
+        translated = po_stream.translation_text(entry)
+        fuzzy = "fuzzy" in entry.flags
+        self.exact[(entry.msgctxt or "", po_stream.source_text(entry))] = (translated, fuzzy)
+        if not entry.msgid_plural and not fuzzy:
+            self.near.add(entry.msgid, translated, entry.msgctxt or "")
+
+    def get(self, entry: polib.POEntry) -> Optional[Tuple[str, bool]]:
+        """(translation, fuzzy) of the same entry in the previous catalog."""
+        return self.exact.get((entry.msgctxt or "", po_stream.source_text(entry)))
+
+    def closest(self, entry: polib.POEntry) -> Optional[FuzzyMatch]:
+        """The previous entry this one was most likely edited from, if any is similar enough."""
+        if entry.msgid_plural or self.min_similarity <= 0:
+            return None
+        return self.near.lookup(entry.msgid, self.min_similarity, entry.msgctxt or "")
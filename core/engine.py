@@ -0,0 +1,715 @@
+import asyncio
+import itertools
+import os
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import polib
+from core.api_manager import APIManager, Segment, TranslationError
+from core.translation_memory import TranslationMemory
+from core.glossary import Glossary, Term
+from core.fuzzy_index import FuzzyIndex, FuzzyMatch
+from core.planner import ChunkPlanner
+from core.delta import PreviousCatalog
+from core.validation import Issue, Validator
+from core.hedging import Hedger
+from core import validation
+from core.checkpoint import TranslationJournal
+from core.telemetry import Telemetry
+from core import placeholders, plural_forms, po_stream
+
+def output_path_for(file_path: str, output_dir: str = "", root: str = "") -> str:
+    """<name>_translated.po next to the input, or under output_dir at the input's path relative to root."""
+    base, _ = os.path.splitext(file_path)
+    output_file = f"{base}_translated.po"
+    if not output_dir:
+        return output_file
+    # Relative to the inputs' common directory, so a/messages.po and b/messages.po do not overwrite each other.
+    relative = os.path.relpath(os.path.abspath(output_file), root) if root else os.path.basename(output_file)
+    return os.path.join(output_dir, relative)
+
+def _take(entries, count: int) -> List[polib.POEntry]:
+    return list(itertools.islice(entries, count))
+
+class Catalog:
+    """One input file of a run: its streamed entries, journal and in-order completion state."""
+
+    def __init__(self, index: int, file_path: str, output_file: str):
+        self.index = index
+        self.file_path = file_path
+        self.output_file = output_file
+        self.po: Optional[polib.POFile] = None
+        self.reader: Optional[po_stream.POReader] = None
+        self.journal: Optional[TranslationJournal] = None
+        self.restored: Dict[Tuple[str, str], str] = {}
+        self.done: Dict[int, Tuple[str, Optional[str], bool]] = {}
+        self._plural_forms: Optional[Tuple[int, str]] = None
+        self.next_emit = 0
+        self.translated = 0
+        self.failed = 0
+        self.saved = False
+
+    @property
+    def total(self) -> int:
+        return len(self.po) if self.po is not None else 0
+
+    @property
+    def expected_total(self) -> int:
+        """Entry count, extrapolated from the bytes read so far while the file is still streaming in."""
+        reader = self.reader
+        if reader is None or reader.done or not reader.position:
+            return self.total
+        return max(self.total, self.total * reader.size // reader.position)
+
+    @property
+    def complete(self) -> bool:
+        return self.reader is not None and self.reader.done and self.next_emit == self.total
+
+    def plural_forms(self, language: str) -> Tuple[int, str]:
+        """(nplurals, plural expression) for the target language, read from the header on first use."""
+        if self._plural_forms is None:
+            self._plural_forms = plural_forms.for_catalog(self.po, language)
+        return self._plural_forms
+
+    def load(self, language: str, model: str):
+        """Open the file for streaming; entries are parsed as the engine pulls them."""
+        self.reader = po_stream.POReader(self.file_path)
+        self.po = self.reader.po
+        if os.path.dirname(self.output_file):
+            os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
+        self.journal = TranslationJournal(TranslationJournal.path_for(self.output_file), self.file_path, language, model)
+        self.restored = self.journal.load()
+        self.journal.open(resume=bool(self.restored))
+
+NUMBER = re.compile(r"\d+")
+
+# A unit of work: the catalog an entry belongs to, its row in that catalog, and the entry itself.
+WorkItem = Tuple[Catalog, int, polib.POEntry]
+
+class TranslationEngine:
+    """Translates one or more .po/.pot files on the running event loop; has no Qt dependency.
+
+    Entries are streamed in, deduplicated and sent in batches by `concurrency` fetch
+    workers; answers are checked off the loop and written back to the file they came
+    from, which is saved as soon as it is complete. Progress is reported through plain
+    callbacks, so the same engine drives the GUI and the command line. The APIManager is
+    owned by the caller and may be shared between engines.
+    """
+    READ_BLOCK = 500
+    MAX_HINTS = 10
+    CHECK_BATCH = 256
+
+    def __init__(self, file_paths: Union[str, Sequence[str]], dest_language: str, api: APIManager, model: str, context: str = "",
+                 overwrite: bool = False, translate_placeholders: bool = True, concurrency: int = 8,
+                 batch_size: int = 20, max_output_tokens: int = 2048, memory: Optional[TranslationMemory] = None,
+                 output_file: str = "", output_dir: str = "", compile_mo: bool = False, verbose: bool = True,
+                 telemetry: Optional[Telemetry] = None, glossary: Optional[Glossary] = None,
+                 fuzzy_threshold: float = 0.0, fuzzy_hint_threshold: float = 0.0, planner: Optional[ChunkPlanner] = None,
+                 previous_files: Sequence[str] = (), delta_similarity: float = PreviousCatalog.SIMILARITY, check_processes: int = 0,
+                 hedge_budget: float = 0.0, hedge_percentile: float = 0.95,
+                 on_log: Optional[Callable[[str], None]] = None, on_progress: Optional[Callable[[int], None]] = None,
+                 on_preview: Optional[Callable[[int, str, str, bool], None]] = None,
+                 on_file_done: Optional[Callable[[Catalog], None]] = None):
+        paths = [file_paths] if isinstance(file_paths, str) else list(file_paths)
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if output_dir and paths else ""
+        self.catalogs = [
+            Catalog(idx, path, output_file if output_file and len(paths) == 1 else output_path_for(path, output_dir, root))
+            for idx, path in enumerate(paths)
+        ]
+        self.dest_language = dest_language
+        self.api = api
+        self.model = model
+        self.context = context
+        self.overwrite = overwrite
+        self.translate_placeholders = translate_placeholders
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.max_output_tokens = max_output_tokens
+        self.planner = planner or ChunkPlanner(max_output_tokens, self.batch_size)
+        self.memory = memory
+        self.compile_mo = compile_mo
+        self.verbose = verbose
+        self.telemetry = telemetry or Telemetry()
+        self.glossary = glossary
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_hint_threshold = fuzzy_hint_threshold
+        self.fuzzy_index: Optional[FuzzyIndex] = None
+        self.previous_files = list(previous_files)
+        self.delta_similarity = delta_similarity
+        self.previous: Optional[PreviousCatalog] = None
+        self.validator = Validator(dest_language, glossary)
+        self.check_processes = max(0, check_processes)
+        self.hedger = Hedger(hedge_budget, hedge_percentile, self.telemetry) if hedge_budget > 0 else None
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.on_preview = on_preview
+        self.on_file_done = on_file_done
+        self.running = False
+        self.paused = False
+        self.failed_entries: List[Tuple[polib.POEntry, str]] = []
+        self.glossary_violations: List[Tuple[polib.POEntry, List[Term]]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._main_task: Optional[asyncio.Task] = None
+        self._resume_event: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._checks: Optional[asyncio.Queue] = None
+        self._duplicates: Dict[Tuple[str, str], List[WorkItem]] = {}
+        self._results: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        self._failures: Dict[Tuple[str, str], str] = {}
+        self._fuzzy: set = set()
+        self._hints: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self._completed = 0
+        self._restored = 0
+        self._duplicate_count = 0
+        self._queued = 0
+
+    @property
+    def file_path(self) -> str:
+        return self.catalogs[0].file_path
+
+    @property
+    def output_file(self) -> str:
+        return self.catalogs[0].output_file
+
+    def _log(self, message: str):
+        if self.on_log:
+            self.on_log(message)
+
+    def _trace(self, message: str):
+        """Per-entry messages; skipped entirely unless verbose, since a large run produces one per string."""
+        if self.verbose and self.on_log:
+            self.on_log(message)
+
+    def _call_in_loop(self, callback):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                pass
+
+    def pause(self):
+        """Hold new requests until resume(); requests already in flight finish normally."""
+        self.paused = True
+        if self._resume_event is not None:
+            self._call_in_loop(self._resume_event.clear)
+
+    def resume(self):
+        self.paused = False
+        if self._resume_event is not None:
+            self._call_in_loop(self._resume_event.set)
+
+    def stop(self):
+        """Cancel the run cooperatively; finished translations stay in the journal for the next run."""
+        self.running = False
+        self.resume()
+        if self._main_task is not None:
+            self._call_in_loop(self._main_task.cancel)
+
+    def _complete(self, item: WorkItem, translated: Optional[str] = None):
+        """Record a finished entry, emit preview/progress in file order and save the file once it is complete."""
+        catalog, entry_idx, entry = item
+        catalog.done[entry_idx] = (entry.msgid, translated, "fuzzy" in entry.flags)
+        if catalog.next_emit not in catalog.done:
+            return
+        while catalog.next_emit in catalog.done:
+            msgid, translated, fuzzy = catalog.done.pop(catalog.next_emit)
+            if translated is not None and self.on_preview and len(self.catalogs) == 1:
+                self.on_preview(catalog.next_emit, msgid, translated, fuzzy)
+            catalog.next_emit += 1
+            self._completed += 1
+        total = self.expected_total
+        self.telemetry.set_progress(self._completed, total)
+        if self.on_progress:
+            self.on_progress(min(100, int(self._completed / max(1, total) * 100)))
+        self._save_if_complete(catalog)
+
+    @property
+    def expected_total(self) -> int:
+        return sum(catalog.expected_total for catalog in self.catalogs)
+
+    def _save_if_complete(self, catalog: Catalog):
+        if catalog.complete and not catalog.saved:
+            self._save(catalog)
+
+    def _save(self, catalog: Catalog):
+        po_stream.save(catalog.po, catalog.output_file, os.path.splitext(catalog.output_file)[0] + ".mo" if self.compile_mo else "")
+        catalog.journal.discard()
+        catalog.saved = True
+        self._log(f"💾 Translated file saved at {catalog.output_file} ({catalog.translated} entries translated)")
+        if self.on_file_done:
+            self.on_file_done(catalog)
+
+    def _should_translate(self, entry: polib.POEntry) -> bool:
+        if not entry.msgid.strip():
+            entry.msgstr = entry.msgid
+            self._trace("ℹ️ Empty text")
+            return False
+        if not self.overwrite and po_stream.has_translation(entry):
+            self._trace(f"⏩ Skipped '{entry.msgid}' (unchanged)")
+            return False
+        if placeholders.has_placeholders(entry.msgid) or placeholders.has_placeholders(entry.msgid_plural):
+            # Masking makes these safe to send; only text that would clash with the mask tokens is left alone.
+            if not self.translate_placeholders or not (placeholders.can_mask(entry.msgid) and placeholders.can_mask(entry.msgid_plural)):
+                self._trace(f"⏩ Skipped '{entry.msgid}' due to variables")
+                return False
+        return True
+
+    def _dedup_key(self, item: WorkItem) -> Tuple[str, str]:
+        entry = item[2]
+        text = " ".join(po_stream.source_text(entry).split())
+        if entry.msgid_plural:
+            # Files whose Plural-Forms differ need different answers for the same strings.
+            text += f"{po_stream.PLURAL_SEPARATOR}{self._forms(item)}"
+        return text, entry.msgctxt or ""
+
+    def _forms(self, item: WorkItem) -> int:
+        catalog, _, entry = item
+        return catalog.plural_forms(self.dest_language)[0] if entry.msgid_plural else 1
+
+    def _fits(self, item: WorkItem, translated: str) -> bool:
+        """Whether a stored translation has as many forms as the entry's catalog needs."""
+        return translated.count(po_stream.PLURAL_SEPARATOR) + 1 == self._forms(item)
+
+    def _segment(self, item: WorkItem) -> Segment:
+        """The entry as sent: its msgctxt tells homonyms apart, and a plural carries its catalog's form count."""
+        catalog, _, entry = item
+        if entry.msgid_plural:
+            return Segment(entry.msgid, entry.msgctxt or "", entry.msgid_plural, *catalog.plural_forms(self.dest_language))
+        return Segment(entry.msgid, entry.msgctxt or "")
+
+    def _write(self, item: WorkItem, msgstr: str):
+        catalog, _, entry = item
+        po_stream.set_translation(entry, msgstr)
+        catalog.translated += 1
+        self.telemetry.record_translated(entry.msgid)
+        if self._fuzzy and self._dedup_key(item) in self._fuzzy:
+            # Pre-filled from a near-match: left for review, and looked up again on resume.
+            if "fuzzy" not in entry.flags:
+                entry.flags.append("fuzzy")
+        elif catalog.journal:
+            catalog.journal.record(po_stream.source_text(entry), entry.msgctxt, msgstr)
+        self._complete(item, msgstr)
+
+    def _write_duplicate(self, item: WorkItem, translated: str, unchanged: bool):
+        """Write a shared translation with the duplicate's own leading/trailing whitespace."""
+        entry = item[2]
+        self._write(item, entry.msgid if unchanged else validation.rewrap(po_stream.source_text(entry), translated))
+
+    def _terms(self, texts: List[str]) -> List[Tuple[str, str]]:
+        """Glossary terms found in a request's strings, added to its prompt."""
+        return self.glossary.terms_for(texts) if self.glossary else []
+
+    def _violations(self, entry: polib.POEntry, translated: str) -> List[Term]:
+        return self.glossary.violations(entry.msgid, translated) if self.glossary else []
+
+    def _apply(self, item: WorkItem, translated: str, remember: bool = True, issues: Sequence[Issue] = ()) -> int:
+        """Write a translation to an entry and every duplicate of it, in any file; returns the number of entries written."""
+        entry = item[2]
+        for issue in issues:
+            if issue.check == "glossary":
+                self.glossary_violations.append((entry, list(issue.terms)))
+                self.telemetry.glossary_violations += 1
+                self._log(f"📘 Glossary not followed in '{translated}' ({issue.message})")
+            else:
+                self.telemetry.check_issues += 1
+                self._log(f"⚠️ Check '{issue.check}' failed for '{translated}': {issue.message}")
+        source = po_stream.source_text(entry)
+        if remember and self.memory and translated != source:
+            self.memory.put(source, entry.msgctxt, self.dest_language, self.model, translated)
+        self._trace(f"✅ Translated: '{translated.replace(po_stream.PLURAL_SEPARATOR, ' | ')}'")
+        self._write(item, translated)
+        key = self._dedup_key(item)
+        if self.fuzzy_index is not None and key not in self._fuzzy and not entry.msgid_plural:
+            self.fuzzy_index.add(entry.msgid, translated, entry.msgctxt or "")
+        # Duplicates read after this point are answered from here without a request.
+        self._results[key] = (translated, translated == entry.msgid)
+        duplicates = self._duplicates.pop(key, [])
+        for dup in duplicates:
+            self._write_duplicate(dup, translated, translated == entry.msgid)
+        return 1 + len(duplicates)
+
+    def _can_prefill(self, entry: polib.POEntry, match: FuzzyMatch) -> bool:
+        """A near-match's translation is only reused when its placeholders and numbers carry over unchanged."""
+        return (placeholders.mask(entry.msgid)[1] == placeholders.mask(match.source)[1]
+                and NUMBER.findall(entry.msgid) == NUMBER.findall(match.source)
+                and placeholders.validate(entry.msgid, match.translation) is None
+                and not self._violations(entry, match.translation))
+
+    def _prefill(self, item: WorkItem, match: FuzzyMatch) -> int:
+        # Only the same msgid under the same msgctxt is trusted as is; anything else waits for review.
+        if match.similarity < 1 or match.context != (item[2].msgctxt or ""):
+            self._fuzzy.add(self._dedup_key(item))
+        self.telemetry.fuzzy_prefilled += 1
+        self._trace(f"🧩 Pre-filled from a {int(match.similarity * 100)}% match: '{match.translation}'")
+        return self._apply(item, validation.rewrap(item[2].msgid, match.translation), remember=False)
+
+    def _carry(self, item: WorkItem) -> bool:
+        """Take an entry's translation from the previous catalog: as it was if the source is unchanged, fuzzy if it was edited."""
+        entry = item[2]
+        found = self.previous.get(entry)
+        if found is not None and self._fits(item, found[0]):
+            translated, fuzzy = found
+            self.telemetry.delta_carried += 1
+        else:
+            match = self.previous.closest(entry)
+            if match is None or not self._can_prefill(entry, match):
+                return False
+            translated, fuzzy = validation.rewrap(entry.msgid, match.translation), True
+            entry.previous_msgid = match.source
+            self.telemetry.delta_fuzzy += 1
+            self._trace(f"🔁 '{entry.msgid}' changed from '{match.source}', kept '{translated}' as fuzzy")
+        po_stream.set_translation(entry, translated)
+        if fuzzy and "fuzzy" not in entry.flags:
+            entry.flags.append("fuzzy")
+        if self.fuzzy_index is not None and not fuzzy and not entry.msgid_plural:
+            self.fuzzy_index.add(entry.msgid, translated, entry.msgctxt or "")
+        self._complete(item, translated)
+        return True
+
+    def _hints_for(self, items: List[WorkItem]) -> List[Tuple[str, str]]:
+        if not self._hints:
+            return []
+        hints = [self._hints[key] for key in dict.fromkeys(self._dedup_key(item) for item in items) if key in self._hints]
+        return hints[:self.MAX_HINTS]
+
+    def _fail(self, item: WorkItem, reason: str):
+        entry = item[2]
+        self._log(f"❌ Failed '{entry.msgid}': {reason}")
+        key = self._dedup_key(item)
+        self._failures[key] = reason
+        for failed in [item] + self._duplicates.pop(key, []):
+            self._fail_one(failed, reason)
+
+    def _fail_one(self, item: WorkItem, reason: str):
+        self.failed_entries.append((item[2], reason))
+        item[0].failed += 1
+        self._complete(item)
+
+    async def _request(self, kind: str, call: Callable[[], Awaitable]):
+        """One API call; with a hedge budget, one slower than hedge_percentile of its kind gets a backup copy."""
+        if self.hedger is None:
+            return await call()
+        # A batch answer with no usable entry is worth waiting for the other copy.
+        return await self.hedger.run(kind, call, lambda result: not isinstance(result, list) or any(item is not None for item in result),
+                                     slot=self._semaphore)
+
+    async def translate_entry(self, item: WorkItem) -> Optional[str]:
+        """The translation of one entry, or None when it failed or the run was stopped."""
+        entry = item[2]
+        await self._resume_event.wait()
+        async with self._semaphore:
+            if not self.running:
+                return None
+            self._trace(f"🔄 Translating '{entry.msgid}'...")
+            try:
+                if entry.msgid_plural:
+                    forms = (await self._request("text", lambda: self.api.translate_batch(
+                        [self._segment(item)], self.dest_language, self.model, self.context, max_output_tokens=self.max_output_tokens,
+                        glossary=self._terms([entry.msgid, entry.msgid_plural]))))[0]
+                    if forms is None:
+                        raise TranslationError(f"expected {self._forms(item)} valid plural forms")
+                    translated = po_stream.PLURAL_SEPARATOR.join(forms)
+                else:
+                    translated = await self._request("text", lambda: self.api.translate_text(
+                        entry.msgid, self.dest_language, self.model, self.context, max_output_tokens=self.max_output_tokens,
+                        glossary=self._terms([entry.msgid]), hints=self._hints_for([item]), msgctxt=entry.msgctxt or ""))
+            except TranslationError as e:
+                self._fail(item, str(e))
+                return None
+        return translated
+
+    async def translate_chunk(self, chunk: List[WorkItem]):
+        """Translate a chunk with one batched request, retrying malformed answers one entry at a time.
+
+        Finished translations are handed to the check stage, which writes them.
+        """
+        if len(chunk) == 1:
+            translated = await self.translate_entry(chunk[0])
+            if translated is not None:
+                await self._submit([(chunk[0], translated)])
+            return
+
+        await self._resume_event.wait()
+        async with self._semaphore:
+            if not self.running:
+                return
+            self._trace(f"🔄 Translating batch of {len(chunk)} entries...")
+            try:
+                texts = [text for _, _, entry in chunk for text in (entry.msgid, entry.msgid_plural) if text]
+                segments, terms, hints = [self._segment(item) for item in chunk], self._terms(texts), self._hints_for(chunk)
+                results = await self._request("batch", lambda: self.api.translate_batch(segments, self.dest_language, self.model, self.context,
+                                                                                        max_output_tokens=self.max_output_tokens, glossary=terms, hints=hints))
+            except TranslationError as e:
+                for item in chunk:
+                    self._fail(item, str(e))
+                return
+
+        retry = [item for item, translated in zip(chunk, results) if translated is None]
+        await self._submit([(item, translated if isinstance(translated, str) else po_stream.PLURAL_SEPARATOR.join(translated))
+                            for item, translated in zip(chunk, results) if translated is not None])
+        if retry:
+            self._log(f"⚠️ Batch answer incomplete, retrying {len(retry)} entries individually")
+            translations = await asyncio.gather(*(self.translate_entry(item) for item in retry))
+            await self._submit([(item, translated) for item, translated in zip(retry, translations) if translated is not None])
+
+    async def _worker(self, queue: asyncio.Queue):
+        while self.running:
+            queued = await queue.get()
+            if queued is None:
+                break
+            enqueued_at, chunk = queued
+            self.telemetry.queue_wait.add(time.monotonic() - enqueued_at)
+            await self.translate_chunk(chunk)
+
+    async def _submit(self, pairs: List[Tuple[WorkItem, str]]):
+        if pairs:
+            await self._checks.put((time.monotonic(), pairs))
+
+    async def _check_stage(self, queue: asyncio.Queue, pool) -> int:
+        """Normalize and validate finished translations in batches off the loop, then write them; returns entries written."""
+        loop = asyncio.get_running_loop()
+        check = validation.check_in_pool if self.check_processes else self.validator.check_batch
+        written = 0
+        finished = False
+        while not finished:
+            queued = [await queue.get()]
+            count = len(queued[0][1]) if queued[0] else 0
+            # Take whatever else is waiting, so a busy run checks in large batches.
+            while count < self.CHECK_BATCH and not queue.empty():
+                queued.append(queue.get_nowait())
+                count += len(queued[-1][1]) if queued[-1] else 0
+            finished = None in queued
+            queued = [entry for entry in queued if entry is not None]
+            if not queued:
+                continue
+            started = time.monotonic()
+            for enqueued_at, _ in queued:
+                self.telemetry.check_wait.add(started - enqueued_at)
+            pairs = [pair for _, batch in queued for pair in batch]
+            checked = await loop.run_in_executor(pool, check, [(po_stream.source_text(item[2]), translated) for item, translated in pairs])
+            written_at = time.monotonic()
+            self.telemetry.check_time.add(written_at - started)
+            for (item, _), (translated, issues) in zip(pairs, checked):
+                written += self._apply(item, translated, issues=issues)
+            self.telemetry.write_time.add(time.monotonic() - written_at)
+        return written
+
+    def _prepare(self, item: WorkItem) -> Tuple[bool, int]:
+        """Restore, skip or deduplicate one freshly read entry.
+
+        Returns (needs_request, entries_written); duplicates of a string that is already
+        finished are written immediately, those of a pending one wait for its answer.
+        """
+        catalog, _, entry = item
+        if self.fuzzy_index is not None and not self.overwrite and not entry.msgid_plural and entry.msgstr.strip() and "fuzzy" not in entry.flags:
+            self.fuzzy_index.add(entry.msgid, entry.msgstr, entry.msgctxt or "")
+        restored = catalog.restored.get((entry.msgctxt or "", po_stream.source_text(entry)))
+        if restored is not None and self._fits(item, restored):
+            po_stream.set_translation(entry, restored)
+            catalog.translated += 1
+            self._restored += 1
+            self._complete(item, restored)
+            return False, 1
+        if self.previous is not None and entry.msgid.strip() and not po_stream.has_translation(entry) and self._carry(item):
+            return False, 0
+        if not self._should_translate(entry):
+            self._complete(item)
+            return False, 0
+        key = self._dedup_key(item)
+        if key in self._duplicates:
+            self._duplicates[key].append(item)
+            self._duplicate_count += 1
+            return False, 0
+        if key in self._results:
+            self._duplicate_count += 1
+            self._write_duplicate(item, *self._results[key])
+            return False, 1
+        if key in self._failures:
+            self._duplicate_count += 1
+            self._fail_one(item, self._failures[key])
+            return False, 0
+        self._duplicates[key] = []
+        if self.memory:
+            cached = self.memory.get(po_stream.source_text(entry), entry.msgctxt, self.dest_language, self.model)
+            if cached is not None and (self._violations(entry, cached) or not self._fits(item, cached)
+                                       or (not entry.msgid_plural and placeholders.validate(entry.msgid, cached))):
+                # Cached before the glossary had this term, for other Plural-Forms, or with broken placeholders; ask again.
+                cached = None
+            self.telemetry.record_cache(cached is not None)
+            if cached is not None:
+                self._trace(f"💾 From memory: '{cached}'")
+                return False, self._apply(item, cached, remember=False)
+        if self.fuzzy_index is not None and not entry.msgid_plural:
+            floor = min(threshold for threshold in (self.fuzzy_threshold, self.fuzzy_hint_threshold) if threshold > 0)
+            match = self.fuzzy_index.lookup(entry.msgid, floor, entry.msgctxt or "")
+            if match is not None:
+                if 0 < self.fuzzy_threshold <= match.similarity and self._can_prefill(entry, match):
+                    return False, self._prefill(item, match)
+                if 0 < self.fuzzy_hint_threshold <= match.similarity:
+                    self._hints[key] = (match.source, match.translation)
+                    self.telemetry.fuzzy_hints += 1
+        return True, 0
+
+    async def _enqueue(self, queue: asyncio.Queue, pending: List[WorkItem], final: bool) -> int:
+        """Plan batches over the entries read so far, heaviest first; the lightest batch waits for more input unless final."""
+        if not pending or (not final and len(pending) < self.batch_size):
+            return 0
+        batches = self.planner.plan([entry.msgid for _, _, entry in pending], [self._forms(item) for item in pending])
+        ready = batches if final else batches[:-1]
+        for batch in ready:
+            await queue.put((time.monotonic(), [pending[i] for i in batch]))
+        pending[:] = [pending[i] for i in batches[-1]] if not final else []
+        return len(ready)
+
+    async def _produce(self, queue: asyncio.Queue) -> int:
+        """Stream every file in, feeding the work queue while later entries are still being parsed."""
+        loop = asyncio.get_running_loop()
+        pending: List[WorkItem] = []
+        written = 0
+        requests = 0
+        for catalog in self.catalogs:
+            entries = iter(catalog.reader)
+            entry_idx = 0
+            while True:
+                block = await loop.run_in_executor(None, _take, entries, self.READ_BLOCK)
+                if not block:
+                    break
+                for entry in block:
+                    needs_request, count = self._prepare((catalog, entry_idx, entry))
+                    if needs_request:
+                        pending.append((catalog, entry_idx, entry))
+                        self._queued += 1
+                    written += count
+                    entry_idx += 1
+                requests += await self._enqueue(queue, pending, final=False)
+            self._save_if_complete(catalog)
+        requests += await self._enqueue(queue, pending, final=True)
+
+        self.telemetry.restored, self.telemetry.deduplicated = self._restored, self._duplicate_count
+        if self._restored:
+            self._log(f"⏯️ Resumed {self._restored} translations from the journal")
+        if self._duplicate_count:
+            self._log(f"♻️ {self._duplicate_count} repeated strings share a translation with an earlier entry ({self._duplicate_count} requests saved)")
+        if self.memory:
+            self._log(f"💾 Translation memory: {self.memory.stats()}")
+        if self.glossary:
+            self._log(f"📘 Glossary: {len(self.glossary)} terms")
+        if self.telemetry.fuzzy_prefilled or self.telemetry.fuzzy_hints:
+            self._log(f"🧩 Fuzzy matches: {self.telemetry.fuzzy_prefilled} entries pre-filled (marked fuzzy unless an exact match), "
+                      f"{self.telemetry.fuzzy_hints} entries sent with a similar translation as a hint")
+        if self.previous is not None:
+            self._log(f"🔁 Delta: {self.telemetry.delta_carried} translations carried over, {self.telemetry.delta_fuzzy} edited entries kept as fuzzy, "
+                      f"{self._queued} new or changed entries to translate")
+        self._log(f"📦 {self._queued} entries from {len(self.catalogs)} file(s) in {requests} requests")
+        return written
+
+    async def _flush_journals(self):
+        """Flush journal records that have waited flush_interval, even while no new record arrives."""
+        interval = min((catalog.journal.flush_interval for catalog in self.catalogs if catalog.journal), default=0)
+        if interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            for catalog in self.catalogs:
+                if catalog.journal:
+                    catalog.journal.flush_if_due()
+
+    async def translate_all(self) -> int:
+        self._completed = 0
+        self._restored = self._duplicate_count = self._queued = 0
+        self._duplicates, self._results, self._failures = {}, {}, {}
+        self._fuzzy, self._hints = set(), {}
+        if self.fuzzy_threshold > 0 or self.fuzzy_hint_threshold > 0:
+            self.fuzzy_index = FuzzyIndex()
+            if self.memory:
+                await asyncio.get_running_loop().run_in_executor(None, self.fuzzy_index.update, self.memory.segments(self.dest_language))
+            self._log(f"🧩 Fuzzy index: {len(self.fuzzy_index)} earlier translations")
+        if self.previous_files:
+            self.previous = await asyncio.get_running_loop().run_in_executor(None, PreviousCatalog.load, self.previous_files, self.delta_similarity)
+            self._log(f"🔁 Delta: {len(self.previous)} translations in the previous catalog")
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._resume_event = asyncio.Event()
+        if not self.paused:
+            self._resume_event.set()
+        if self.glossary:
+            # Compiles the automaton before the check stage's threads share it.
+            self.glossary.find("")
+        pool = validation.start_pool(self.validator, self.check_processes) if self.check_processes else None
+
+        # Both bounded: parsing never runs far ahead of the requests, nor requests ahead of the checks.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        self._checks = asyncio.Queue(maxsize=self.concurrency * 4)
+        workers = [asyncio.ensure_future(self._worker(queue)) for _ in range(self.concurrency)]
+        checker = asyncio.ensure_future(self._check_stage(self._checks, pool))
+        flusher = asyncio.ensure_future(self._flush_journals())
+        # A stage that dies would leave the others blocked on its queue; cancel the run and raise its error instead.
+        run_task = asyncio.current_task()
+        failed: List[BaseException] = []
+
+        def watch(task: asyncio.Future):
+            if not task.cancelled() and task.exception() is not None and not failed:
+                failed.append(task.exception())
+                run_task.cancel()
+
+        for task in workers + [checker]:
+            task.add_done_callback(watch)
+        try:
+            written = await self._produce(queue)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            await self._checks.put(None)
+            written += await checker
+        except asyncio.CancelledError:
+            if failed:
+                raise failed[0]
+            raise
+        finally:
+            for task in workers + [checker, flusher]:
+                task.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        stats = self.telemetry.snapshot()
+        if self.hedger is not None and stats["hedged"]:
+            self._log(f"🏁 Hedging: {stats['hedged']} backup requests, {stats['hedge_wins']} answered first, "
+                      f"about {stats['hedge_saved']}s of waiting saved")
+        self._log(f"⏱️ Stages (p50): fetch {stats['latency']['p50']}s per request, waiting for a check {stats['check_wait']['p50']}s, "
+                  f"check {stats['check']['p50']}s and write {stats['write']['p50']}s per batch")
+        return written
+
+    async def run(self) -> Tuple[List[str], int]:
+        """Translate and save every file; returns (saved output files, translated_count).
+
+        Each file is saved as soon as all of its entries are done, so stopping a project
+        run keeps the files that were already finished.
+        """
+        self.running = True
+        self.failed_entries = []
+        self.glossary_violations = []
+        self._loop = asyncio.get_running_loop()
+        self.api.telemetry = self.telemetry
+        self._log("🚀 Translation started...")
+        try:
+            for catalog in self.catalogs:
+                catalog.load(self.dest_language, self.model)
+            self._main_task = asyncio.ensure_future(self.translate_all())
+            try:
+                translated_count = await self._main_task
+            except asyncio.CancelledError:
+                if self.running:
+                    raise
+                translated_count = 0
+            if not self.running:
+                self._log("⛔ Translation stopped; finished entries are kept for the next run")
+            return [catalog.output_file for catalog in self.catalogs if catalog.saved], translated_count
+        finally:
+            self.running = False
+            self.telemetry.finish()
+            for catalog in self.catalogs:
+                if catalog.journal:
+                    catalog.journal.close()
+            if self.memory:
+                self.memory.flush()
+            self._main_task = None
+            self._loop = None
@@ -1,27 +1,24 @@
-import polib
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from core import po_stream
 
 class FileManager:
     def __init__(self):
-        self.po_file = None
-        self.entries: List[polib.POEntry] = []
+        self.po_index: Optional[po_stream.POIndex] = None
+        self.file_paths: List[str] = []
 
     def load_file(self, file_path: str) -> Tuple[bool, str]:
+        """Open a file for preview; its entries are indexed by the table model in the background."""
         try:
-            self.po_file = polib.pofile(file_path, wrapwidth=0, check_for_duplicates=False)
-            self.entries = list(self.po_file)
-            return True, f"Loaded {len(self.entries)} entries"
+            self.po_index = po_stream.POIndex(file_path)
+            self.file_paths = [file_path]
+            return True, f"Opened {file_path}"
         except Exception as e:
             return False, f"Error loading file: {str(e)}"
 
-    def save_translated(self, output_path: str) -> bool:
-        if not self.po_file:
-            return False
-        try:
-            self.po_file.save(output_path)
-            return True
-        except Exception:
-            return False
-
-    def get_entries(self) -> List[polib.POEntry]:
-        return self.entries
\ No newline at end of file
+    def load_files(self, file_paths: List[str]) -> Tuple[bool, str]:
+        """Load a project: the first file is indexed for preview, all of them are translated together."""
+        success, message = self.load_file(file_paths[0])
+        if success and len(file_paths) > 1:
+            self.file_paths = list(file_paths)
+            message = f"{message}; project of {len(file_paths)} files"
+        return success, message
@@ -0,0 +1,149 @@
+"""Near-match lookup over previous translations for fuzzy pre-translation.
+
+Source strings are indexed by their character trigrams. A lookup only scans the postings
+of the query's rarest trigrams: by the q-gram lemma, a string within edit distance d
+shares all but at most 3*d of the query's distinct trigrams, so a match must contain one
+of its 3*d + 1 rarest. The few candidates found that way are ranked by how many of those
+trigrams they share and verified with a bounded Levenshtein distance. Postings are read
+rarest first up to POSTINGS_BUDGET ids, which keeps a lookup under a millisecond on
+hundreds of thousands of segments; a string made only of very common trigrams may then
+miss its match, which costs a request, never a wrong pre-translation.
+"""
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+Q = 3
+
+class FuzzyMatch(NamedTuple):
+    source: str
+    translation: str
+    similarity: float
+    # msgctxt of the matched string; the same text under another context is a different message.
+    context: str = ""
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def grams(text: str) -> set:
+    padded = f" {text} "
+    return {padded[i:i + Q] for i in range(len(padded) - Q + 1)}
+
+def distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit + 1 as soon as it is known to exceed limit."""
+    # Most near-matches differ in one spot; the shared prefix and suffix cost nothing.
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > limit:
+        return limit + 1
+    if not a:
+        return len(b)
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        best = i
+        for j, char_b in enumerate(b, 1):
+            cost = previous[j - 1] + (char_a != char_b)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+class FuzzyIndex:
+    MIN_LENGTH = 8
+    VERIFY = 8
+    POSTINGS_BUDGET = 5000
+
+    def __init__(self):
+        self.sources: List[str] = []
+        self.keys: List[str] = []
+        self.translations: List[str] = []
+        self.contexts: List[str] = []
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, source: str, translation: str, context: str = ""):
+        """Index a translated string; a later translation of the same source and msgctxt replaces the earlier one."""
+        key = normalize(source)
+        if len(key) < self.MIN_LENGTH or not translation.strip():
+            return
+        idx = self._ids.get((context, key))
+        if idx is not None:
+            self.translations[idx] = translation
+            return
+        idx = self._ids[(context, key)] = len(self.sources)
+        self.sources.append(source)
+        self.keys.append(key)
+        self.translations.append(translation)
+        self.contexts.append(context)
+        postings = self._postings
+        for gram in grams(key):
+            if gram not in postings:
+                postings[gram] = array("I")
+            postings[gram].append(idx)
+
+    def update(self, segments: Iterable[Tuple[str, str, str]]):
+        """Index (source, translation, msgctxt) triples."""
+        for source, translation, context in segments:
+            self.add(source, translation, context)
+
+    def lookup(self, text: str, min_similarity: float, context: str = "") -> Optional[FuzzyMatch]:
+        """Best previous translation whose source is at least min_similarity alike (1 - distance / longer length).
+
+        Only a string with the same msgctxt is an exact match; the same text under another
+        context can still be returned, with its own context, as a near-match.
+        """
+        key = normalize(text)
+        if len(key) < self.MIN_LENGTH or not self.sources or min_similarity <= 0:
+            return None
+        idx = self._ids.get((context, key))
+        if idx is not None:
+            return FuzzyMatch(self.sources[idx], self.translations[idx], 1.0, context)
+        # A match is at most len/min_similarity long, so it is within this many edits.
+        limit = int((1 - min_similarity) * len(key) / min_similarity)
+        postings = self._postings
+        query = sorted((gram for gram in grams(key) if gram in postings), key=lambda gram: len(postings[gram]))
+        hits: Counter = Counter()
+        scanned = 0
+        for gram in query[:Q * limit + 1]:
+            scanned += len(postings[gram])
+            if scanned > self.POSTINGS_BUDGET:
+                break
+            hits.update(postings[gram])
+        best: Optional[FuzzyMatch] = None
+        lowest, highest = len(key) * min_similarity, len(key) / min_similarity
+        verified = 0
+        for candidate, _ in hits.most_common():
+            other = self.keys[candidate]
+            if not lowest <= len(other) <= highest:
+                continue
+            longer = max(len(key), len(other))
+            allowed = min(limit, int(longer * (1 - (best.similarity if best else min_similarity))))
+            edits = distance(key, other, allowed)
+            if edits <= allowed:
+                similarity = 1 - edits / longer
+                if best is None or similarity > best.similarity:
+                    best = FuzzyMatch(self.sources[candidate], self.translations[candidate], similarity, self.contexts[candidate])
+            verified += 1
+            if verified >= self.VERIFY:
+                break
+        if best is not None and best.similarity < min_similarity:
+            return None
+        return best
@@ -0,0 +1,208 @@
+"""Terminology the translations must follow, loaded from CSV or TBX.
+
+Source terms are compiled into one Aho-Corasick automaton, so finding every term in a
+string costs a single pass over it however large the glossary is. Only the terms that
+occur in a request's strings are put into its prompt, and finished translations are
+checked for the expected target terms.
+"""
+import csv
+import os
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+class Term(NamedTuple):
+    source: str
+    targets: Tuple[str, ...]
+    note: str = ""
+
+    @property
+    def target(self) -> str:
+        return self.targets[0]
+
+class GlossaryError(ValueError):
+    """A glossary file that could not be read."""
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+class Glossary:
+    MAX_PROMPT_TERMS = 40
+
+    def __init__(self, terms: Iterable[Term] = ()):
+        self.terms: List[Term] = []
+        self._index: Dict[str, int] = {}
+        # Aho-Corasick automaton over lower-cased source terms: goto edges, failure links and,
+        # per state, the index of the term ending exactly there.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[int]] = [None]
+        self._lengths: List[int] = []
+        self._dirty = False
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+    def add(self, term: Term):
+        key = term.source.strip().lower()
+        if not key or not term.targets:
+            return
+        if key in self._index:
+            # A later file overrides an earlier one, like settings do.
+            self.terms[self._index[key]] = term
+            return
+        self._index[key] = len(self.terms)
+        self.terms.append(term)
+        self._dirty = True
+
+    @classmethod
+    def load(cls, paths: Sequence[str], target_language: str, source_language: str = "en") -> "Glossary":
+        """Read one or more .csv/.tbx files; later files override terms of earlier ones."""
+        glossary = cls()
+        for path in ([paths] if isinstance(paths, str) else paths):
+            loader = cls._read_tbx if path.lower().endswith((".tbx", ".xml")) else cls._read_csv
+            try:
+                for term in loader(path, target_language, source_language):
+                    glossary.add(term)
+            except (OSError, csv.Error, ET.ParseError, UnicodeDecodeError) as e:
+                raise GlossaryError(f"Could not read glossary {os.path.basename(path)}: {e}")
+        return glossary
+
+    @staticmethod
+    def _read_csv(path: str, target_language: str, source_language: str) -> Iterable[Term]:
+        """Rows of source,target[,note]; a header row naming the columns is skipped, '|' separates alternative targets."""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            for row_number, row in enumerate(csv.reader(f, dialect)):
+                if len(row) < 2:
+                    continue
+                source, target = row[0].strip(), row[1].strip()
+                if row_number == 0 and (source.lower(), target.lower()) in (("source", "target"), ("term", "translation"), (source_language, target_language)):
+                    continue
+                targets = tuple(part.strip() for part in target.split("|") if part.strip())
+                if source and targets:
+                    yield Term(source, targets, row[2].strip() if len(row) > 2 else "")
+
+    @staticmethod
+    def _read_tbx(path: str, target_language: str, source_language: str) -> Iterable[Term]:
+        """Concept entries of TBX 2 (termEntry/langSet/tig) or TBX 3 (conceptEntry/langSec/termSec)."""
+        def local(tag: str) -> str:
+            return tag.rsplit("}", 1)[-1]
+
+        def matches(lang: str, wanted: str) -> bool:
+            lang = lang.lower().replace("_", "-")
+            return lang == wanted or lang.startswith(wanted + "-")
+
+        for _, element in ET.iterparse(path, events=("end",)):
+            if local(element.tag) not in ("termEntry", "conceptEntry"):
+                continue
+            sources: List[str] = []
+            targets: List[str] = []
+            note = ""
+            for lang_set in element:
+                if local(lang_set.tag) not in ("langSet", "langSec"):
+                    if local(lang_set.tag) in ("descrip", "note") and lang_set.text:
+                        note = lang_set.text.strip()
+                    continue
+                lang = lang_set.get(XML_LANG) or lang_set.get("lang") or ""
+                found = [term.text.strip() for term in lang_set.iter() if local(term.tag) == "term" and term.text and term.text.strip()]
+                if matches(lang, source_language):
+                    sources.extend(found)
+                elif matches(lang, target_language):
+                    targets.extend(found)
+            if targets:
+                for source in sources:
+                    yield Term(source, tuple(targets), note)
+            element.clear()
+
+    def _build(self):
+        self._goto, self._fail, self._output = [{}], [0], [None]
+        self._lengths = [len(term.source.strip()) for term in self.terms]
+        for idx, term in enumerate(self.terms):
+            state = 0
+            for char in term.source.strip().lower():
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                state = nxt
+            self._output[state] = idx
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+        self._dirty = False
+
+    def _hits(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, term index) of every whole-word occurrence, case-insensitively."""
+        if self._dirty:
+            self._build()
+        lowered = text.lower()
+        goto, fail, output, lengths = self._goto, self._fail, self._output, self._lengths
+        hits = []
+        state = 0
+        for end, char in enumerate(lowered, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            probe = state
+            while probe:
+                idx = output[probe]
+                if idx is not None:
+                    start = end - lengths[idx]
+                    if (start == 0 or not _is_word(lowered[start - 1])) and (end == len(lowered) or not _is_word(lowered[end])):
+                        hits.append((start, end, idx))
+                probe = fail[probe]
+        return hits
+
+    def find(self, text: str) -> List[Term]:
+        """Terms occurring in text, leftmost-longest and without overlaps, in order of appearance."""
+        if not self.terms:
+            return []
+        found: List[Term] = []
+        seen = set()
+        covered = 0
+        for start, end, idx in sorted(self._hits(text), key=lambda hit: (hit[0], hit[0] - hit[1])):
+            if start < covered:
+                continue
+            covered = end
+            if idx not in seen:
+                seen.add(idx)
+                found.append(self.terms[idx])
+        return found
+
+    def terms_for(self, texts: Iterable[str]) -> List[Tuple[str, str]]:
+        """(source, target) pairs to put in the prompt for these strings, at most MAX_PROMPT_TERMS."""
+        pairs: List[Tuple[str, str]] = []
+        seen = set()
+        for text in texts:
+            for term in self.find(text):
+                if term.source not in seen:
+                    seen.add(term.source)
+                    pairs.append((term.source, term.target))
+                    if len(pairs) >= self.MAX_PROMPT_TERMS:
+                        return pairs
+        return pairs
+
+    def violations(self, source: str, translation: str) -> List[Term]:
+        """Terms found in the source whose target (or any alternative) is missing from the translation."""
+        lowered = translation.lower()
+        return [term for term in self.find(source) if not any(target.lower() in lowered for target in term.targets)]
@@ -0,0 +1,107 @@
+"""Hedged requests: a backup copy for a request that is slower than almost all others.
+
+Once a request has run longer than a high percentile of recent latencies, the same call
+is made again (a ProviderPool may route it to another model), the first usable answer
+wins and the other request is cancelled. Backups are capped at `budget` times the number
+of requests, so a provider that is slow across the board is not sent twice the load.
+"""
+import asyncio
+import contextlib
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from core.telemetry import Telemetry
+
+T = TypeVar("T")
+
+class Hedger:
+    MIN_SAMPLES = 10
+    MIN_DELAY = 0.5
+    WINDOW = 200
+
+    def __init__(self, budget: float = 0.1, percentile: float = 0.95, telemetry: Optional[Telemetry] = None):
+        self.budget = budget
+        self.percentile = percentile
+        self.telemetry = telemetry or Telemetry()
+        # Per kind of call; a batch takes far longer than a single string.
+        self._latencies: Dict[str, Deque[float]] = {}
+        # Complete latencies of requests that ran past the hedging delay, to estimate the time a backup saved.
+        self._slow: Dict[str, Deque[float]] = {}
+        self._requests = 0
+        self._hedged = 0
+
+    def delay(self, kind: str) -> Optional[float]:
+        """Seconds after which a request of this kind gets a backup, or None until enough were seen."""
+        samples = self._latencies.get(kind)
+        if samples is None or len(samples) < self.MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return max(self.MIN_DELAY, ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))])
+
+    def _observe(self, kind: str, latency: float):
+        """Record the latency of a request that succeeded; failed or cancelled ones say nothing about the provider's speed."""
+        delay = self.delay(kind)
+        if latency > (delay if delay is not None else self.MIN_DELAY):
+            if kind not in self._slow:
+                self._slow[kind] = deque(maxlen=self.WINDOW)
+            self._slow[kind].append(latency)
+        if kind not in self._latencies:
+            self._latencies[kind] = deque(maxlen=self.WINDOW)
+        self._latencies[kind].append(latency)
+
+    def _tail(self, kind: str) -> Optional[float]:
+        """Mean latency of the slow requests that ran to the end: what a hedged request would likely have taken."""
+        slow = self._slow.get(kind)
+        return sum(slow) / len(slow) if slow else None
+
+    async def _timed(self, kind: str, call: Callable[[], Awaitable[T]], slot: Optional[asyncio.Semaphore] = None) -> T:
+        """call(), holding a slot of `slot` if given; its latency is recorded once it succeeds."""
+        async with slot if slot is not None else contextlib.nullcontext():
+            started = time.monotonic()
+            result = await call()
+            self._observe(kind, time.monotonic() - started)
+            return result
+
+    async def run(self, kind: str, call: Callable[[], Awaitable[T]], usable: Callable[[T], bool] = lambda result: True,
+                  slot: Optional[asyncio.Semaphore] = None) -> T:
+        """Await call(), sending a second call() if the first is slow; raises the first request's error if neither is usable.
+
+        The caller already holds a slot for the first call; the backup takes one of `slot` too,
+        so hedging never puts more than the caller's concurrency in flight.
+        """
+        self._requests += 1
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(kind, call))
+        delay = self.delay(kind)
+        if delay is not None:
+            try:
+                await asyncio.wait({primary}, timeout=delay)
+            except asyncio.CancelledError:
+                primary.cancel()
+                raise
+        if primary.done() or delay is None or self._hedged >= self.budget * self._requests:
+            return await primary
+
+        self._hedged += 1
+        self.telemetry.hedged += 1
+        backup = asyncio.ensure_future(self._timed(kind, call, slot))
+        pending = {primary, backup}
+        fallback: Optional[asyncio.Future] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and usable(task.result()):
+                        if task is backup:
+                            self.telemetry.hedge_wins += 1
+                            tail = self._tail(kind)
+                            if tail is not None:
+                                self.telemetry.hedge_saved += max(0.0, tail - (time.monotonic() - started))
+                        return task.result()
+                    if fallback is None or task is primary:
+                        fallback = task
+            return fallback.result()
+        finally:
+            for task in pending:
+                task.cancel()
+                self.telemetry.hedge_cancelled += 1
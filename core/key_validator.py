@@ -0,0 +1,64 @@
+from PySide6.QtCore import QThread, Signal
+import asyncio
+import threading
+from typing import Dict, Set, Tuple
+from core.api_manager import APIManager
+
+class KeyValidator(QThread):
+    """Checks API keys on a persistent event loop of its own, so the window never waits on the network.
+
+    Results arrive through `validated`. Keys that passed are remembered per service for the
+    session, so starting a translation with a key that was already checked needs no request.
+    """
+    validated = Signal(str, str, bool, str)
+
+    def __init__(self):
+        super().__init__()
+        self._loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        self._valid: Dict[Tuple[str, str], str] = {}
+        self._pending: Set[Tuple[str, str]] = set()
+
+    def is_valid(self, service: str, api_key: str) -> bool:
+        with self._lock:
+            return (service, api_key) in self._valid
+
+    def validate(self, service: str, api_key: str, force: bool = False):
+        """Check a key in the background; `force` asks again even if the key already passed this session."""
+        key = (service, api_key)
+        with self._lock:
+            message = self._valid.get(key)
+            if message is not None and not force:
+                self.validated.emit(service, api_key, True, message)
+                return
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        if not self.isRunning():
+            self.start()
+        asyncio.run_coroutine_threadsafe(self._validate(service, api_key), self._loop)
+
+    async def _validate(self, service: str, api_key: str):
+        async with APIManager(service, api_key) as api_manager:
+            is_valid, message = await api_manager.validate_api_key()
+        with self._lock:
+            self._pending.discard((service, api_key))
+            if is_valid:
+                self._valid[(service, api_key)] = message
+            else:
+                self._valid.pop((service, api_key), None)
+        self.validated.emit(service, api_key, is_valid, message)
+
+    def run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self._loop.close()
+
+    def stop(self):
+        if self.isRunning():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self.wait()
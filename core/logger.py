@@ -1,30 +1,69 @@
 import logging
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Callable, List, Optional
+
+class UIHandler(logging.Handler):
+    """Passes formatted lines to a UI callback; inside batch() they are joined into one call."""
+
+    def __init__(self, callback: Callable[[str], None]):
+        super().__init__()
+        self.callback = callback
+        self._batch: Optional[List[str]] = None
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.format(record)
+            if self._batch is not None:
+                self._batch.append(line)
+            else:
+                self.callback(line)
+        except Exception:
+            self.handleError(record)
+
+    @contextmanager
+    def batch(self):
+        self._batch = []
+        try:
+            yield
+        finally:
+            lines, self._batch = self._batch, None
+            if lines:
+                self.callback("\n".join(lines))
 
 class Logger:
+    LEVELS = {"info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
     def __init__(self, log_file: str = "translator.log"):
         self.logger = logging.getLogger("TranslatorApp")
         self.logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(message)s')
-        
+        self.formatter = logging.Formatter('%(asctime)s - %(message)s')
+
         # File handler
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(self.formatter)
         self.logger.addHandler(file_handler)
-        
-        # Stream handler for UI
-        self.stream_handler = logging.StreamHandler()
-        self.stream_handler.setFormatter(formatter)
-        self.logger.addHandler(self.stream_handler)
+
+        # UI handler, attached by set_ui_handler
+        self.ui_handler: Optional[UIHandler] = None
 
     def log(self, message: str, level: str = "info"):
-        if level == "info":
-            self.logger.info(message)
-        elif level == "warning":
-            self.logger.warning(message)
-        elif level == "error":
-            self.logger.error(message)
-
-    def set_ui_handler(self, ui_callback):
+        self.logger.log(self.LEVELS.get(level, logging.INFO), message)
+
+    def log_many(self, messages: List[str], level: str = "info"):
+        """Log a batch of lines; the UI receives them as a single append."""
+        if self.ui_handler is None:
+            for message in messages:
+                self.log(message, level)
+            return
+        with self.ui_handler.batch():
+            for message in messages:
+                self.log(message, level)
+
+    def set_ui_handler(self, ui_callback: Callable[[str], None]):
         """Set a callback to send logs to UI."""
-        self.stream_handler.stream = ui_callback
\ No newline at end of file
+        if self.ui_handler is not None:
+            self.logger.removeHandler(self.ui_handler)
+        self.ui_handler = UIHandler(ui_callback)
+        self.ui_handler.setFormatter(self.formatter)
+        self.logger.addHandler(self.ui_handler)
@@ -0,0 +1,125 @@
+"""Placeholder masking for prompts.
+
+printf conversions (%s, %1$s, %.2f, %%), brace variables ({0}, {name}), HTML tags and
+WordPress shortcodes are swapped for numbered <xN/> tokens before a string is sent, and
+swapped back afterwards. The model can move a token but not misspell it, and the answer
+is checked structurally rather than by string equality: every placeholder comes back
+exactly once, unnumbered printf conversions keep their order (sprintf consumes them
+positionally) and tags/shortcodes stay properly nested. The singular and plural of an
+entry share one numbering, and plural forms other than the last may drop placeholders
+("One item" for "%d items").
+"""
+import re
+from typing import List, Optional, Tuple
+
+PLACEHOLDER = re.compile(
+    r"%(?:\d+\$)?[-+0#']*(?:\d+|\*)?(?:\.\d+)?[bcdeEfFgGiosuxX%]"  # printf, optionally positional
+    r"|\{\{?[A-Za-z0-9_.:-]*\}\}?"                               # {0}, {name}, {{var}}
+    r"|</?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>"                 # HTML tags
+    r"|\[/?[A-Za-z][A-Za-z0-9_-]*(?:\s[^\[\]]*)?/?\]"             # [shortcode attr="..."]
+)
+TOKEN = re.compile(r"<\s*x(\d+)\s*/?\s*>")
+UNNUMBERED_PRINTF = re.compile(r"%(?!\d+\$)(?!%)")
+TAG_NAME = re.compile(r"^[<\[](/?)([A-Za-z][A-Za-z0-9_-]*)")
+VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "wbr", "source", "area", "col", "embed", "param", "track"}
+
+class PlaceholderError(ValueError):
+    """A translation whose placeholders cannot be restored safely."""
+
+def has_placeholders(text: str) -> bool:
+    return PLACEHOLDER.search(text) is not None
+
+def can_mask(text: str) -> bool:
+    """Whether mask() keeps the text restorable: a literal <x1/> in it would be taken for one of the tokens."""
+    return TOKEN.search(text) is None
+
+def has_text(text: str) -> bool:
+    """Whether anything but placeholders and punctuation is left to translate."""
+    return any(char.isalpha() for char in PLACEHOLDER.sub("", text))
+
+def mask(text: str, known: Optional[List[str]] = None) -> Tuple[str, List[str]]:
+    """Replace placeholders with <x1/>, <x2/>, ... tokens; returns (masked text, placeholders in order).
+
+    With `known` (the list returned for another text), equal placeholders reuse its tokens
+    and new ones are appended to it.
+    """
+    placeholders: List[str] = known if known is not None else []
+    shared = list(range(len(placeholders)))
+
+    def token(match) -> str:
+        for position, number in enumerate(shared):
+            if placeholders[number] == match.group(0):
+                del shared[position]
+                return f"<x{number + 1}/>"
+        placeholders.append(match.group(0))
+        return f"<x{len(placeholders)}/>"
+
+    return PLACEHOLDER.sub(token, text), placeholders
+
+def unmask(text: str, placeholders: List[str], partial: bool = False) -> str:
+    """Restore masked tokens, raising PlaceholderError if the answer lost, duplicated or broke any of them.
+
+    With `partial`, placeholders may be left out (plural forms other than the last).
+    """
+    seen: List[int] = []
+
+    def restore(match) -> str:
+        number = int(match.group(1))
+        if not 1 <= number <= len(placeholders):
+            raise PlaceholderError(f"unknown placeholder token {match.group(0)}")
+        seen.append(number)
+        return placeholders[number - 1]
+
+    restored = TOKEN.sub(restore, text)
+    expected = sorted(set(seen)) if partial else list(range(1, len(placeholders) + 1))
+    if sorted(seen) != expected:
+        missing = [placeholders[n - 1] for n in expected if n not in seen]
+        raise PlaceholderError(f"placeholders not kept: {', '.join(missing)}" if missing else "placeholders duplicated")
+    if len(PLACEHOLDER.findall(restored)) != len(expected):
+        raise PlaceholderError("placeholders added by the translation")
+    order = [placeholders[n - 1] for n in seen]
+    problem = _structure_problem([placeholders[n - 1] for n in expected], order)
+    if problem:
+        raise PlaceholderError(problem)
+    return restored
+
+def validate(original: str, translated: str) -> Optional[str]:
+    """Reason an unmasked translation is unsafe, or None; for text that was not masked (e.g. from memory)."""
+    expected = PLACEHOLDER.findall(original)
+    found = PLACEHOLDER.findall(translated)
+    if sorted(expected) != sorted(found):
+        return "placeholders changed"
+    return _structure_problem(expected, found)
+
+def _structure_problem(original: List[str], translated: List[str]) -> Optional[str]:
+    printf = [p for p in original if UNNUMBERED_PRINTF.match(p)]
+    if printf != [p for p in translated if UNNUMBERED_PRINTF.match(p)]:
+        return "unnumbered printf placeholders reordered"
+    if _nested(original) and not _nested(translated):
+        return "tags no longer nested"
+    return None
+
+def _nested(placeholders: List[str]) -> bool:
+    stack: List[str] = []
+    for placeholder in placeholders:
+        match = TAG_NAME.match(placeholder)
+        if not match or placeholder.endswith("/>") or placeholder.endswith("/]"):
+            continue
+        closing, name = match.group(1), placeholder[0] + match.group(2).lower()
+        if name[1:] in VOID_TAGS and placeholder[0] == "<":
+            continue
+        if not closing:
+            stack.append(name)
+        elif name in stack:
+            # Unclosed shortcodes inside may be dropped; an unclosed tag inside means crossed tags.
+            while stack:
+                top = stack.pop()
+                if top == name:
+                    break
+                if top[0] == "<":
+                    return False
+        else:
+            # Shortcodes are often self-closing without a slash; an unmatched close is only bad for tags.
+            if name[0] == "<":
+                return False
+    return True
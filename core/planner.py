@@ -0,0 +1,54 @@
+"""Packing of entries into batched requests by estimated token cost; no I/O, usable on its own."""
+from typing import List, Optional, Sequence
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; UTF-8 bytes / 4 keeps Persian and Arabic from being underestimated."""
+    return len(text.encode("utf-8")) // 4 + 1
+
+class ChunkPlanner:
+    """Packs strings into requests whose expected JSON answer fits the output-token budget.
+
+    Uses first-fit decreasing: the heaviest strings are placed first, each into the first
+    request with room left, so a 2 KB help paragraph starts early instead of becoming the
+    tail of the run and short strings fill the space the long ones leave. Requests are
+    returned heaviest first; the lightest ones go last and keep idle workers busy at the
+    end. Subclass and override `cost` or `plan` to give TranslationEngine another strategy.
+    """
+
+    def __init__(self, max_output_tokens: int = 2048, max_items: int = 20, fill: float = 0.75):
+        self.max_output_tokens = max_output_tokens
+        self.max_items = max(1, max_items)
+        self.budget = int(max_output_tokens * fill)
+
+    def cost(self, text: str) -> int:
+        """Expected output tokens: the translation (up to twice the source) plus its JSON key and quoting."""
+        return estimate_tokens(text) * 2 + 8
+
+    def plan(self, texts: Sequence[str], forms: Optional[Sequence[int]] = None) -> List[List[int]]:
+        """Indices of texts grouped into requests; entries inside a request keep their original order.
+
+        `forms` gives the number of strings expected back per text (plural entries answer with several).
+        """
+        costs = [self.cost(text) * (forms[idx] if forms else 1) for idx, text in enumerate(texts)]
+        order = sorted(range(len(texts)), key=costs.__getitem__, reverse=True)
+        batches: List[List[int]] = []
+        loads: List[int] = []
+        # Requests that can still take the cheapest string; full ones drop out so packing stays near-linear.
+        open_batches: List[int] = []
+        cheapest = min(costs) if costs else 0
+        for idx in order:
+            cost = costs[idx]
+            for position, batch_idx in enumerate(open_batches):
+                if loads[batch_idx] + cost <= self.budget:
+                    batches[batch_idx].append(idx)
+                    loads[batch_idx] += cost
+                    if len(batches[batch_idx]) >= self.max_items or loads[batch_idx] + cheapest > self.budget:
+                        del open_batches[position]
+                    break
+            else:
+                batches.append([idx])
+                loads.append(cost)
+                if self.max_items > 1 and cost + cheapest <= self.budget:
+                    open_batches.append(len(batches) - 1)
+        ranked = sorted(range(len(batches)), key=loads.__getitem__, reverse=True)
+        return [sorted(batches[batch_idx]) for batch_idx in ranked]
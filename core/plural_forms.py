@@ -0,0 +1,33 @@
+"""Plural-Forms headers: how many forms a language has and which form a count selects."""
+import re
+from typing import Optional, Tuple
+import polib
+
+# gettext's rules for the target languages, used when a catalog has no usable header.
+DEFAULTS = {
+    "en": "nplurals=2; plural=(n != 1);",
+    "fa": "nplurals=2; plural=(n > 1);",
+    "ar": "nplurals=6; plural=(n==0 ? 0 : n==1 ? 1 : n==2 ? 2 : n%100>=3 && n%100<=10 ? 3 : n%100>=11 ? 4 : 5);"
+}
+HEADER = re.compile(r"nplurals\s*=\s*(\d+)\s*;\s*plural\s*=\s*([^;]+);?")
+
+def parse(header: str) -> Optional[Tuple[int, str]]:
+    """(nplurals, plural expression) from a Plural-Forms value; None for a missing or template value."""
+    match = HEADER.search(header or "")
+    if not match or int(match.group(1)) < 1:
+        return None
+    return int(match.group(1)), match.group(2).strip()
+
+def for_catalog(po: polib.POFile, language: str) -> Tuple[int, str]:
+    """The catalog's own rule when its header is for the target language, else the default.
+
+    A default is written into the header as well, so the saved file compiles with msgfmt.
+    """
+    header_language = po.metadata.get("Language", "").lower().replace("_", "-")
+    parsed = parse(po.metadata.get("Plural-Forms", ""))
+    if parsed and (not header_language or header_language.split("-")[0] == language):
+        return parsed
+    default = DEFAULTS.get(language, DEFAULTS["en"])
+    po.metadata["Language"] = language
+    po.metadata["Plural-Forms"] = default
+    return parse(default)
@@ -0,0 +1,353 @@
+"""Streaming .po reader and a writer that only re-renders what changed.
+
+The reader walks the file through mmap and yields polib.POEntry objects one at a time,
+so work can start on the first entries of a large catalog while the rest is still
+being read. The catalog keeps, in flat arrays, the byte span each entry came from and
+a hash of its fields; `save` copies the spans of unchanged entries verbatim and renders
+changed ones with polib itself, so the output matches what polib would write for those entries.
+Anything the span writer cannot express (entries added, removed or reordered) falls
+back to a plain polib save.
+"""
+import codecs
+import mmap
+import os
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+import polib
+
+KEYWORDS = {"msgctxt": "ct", "msgid": "mi", "msgid_plural": "mp", "msgstr": "ms"}
+PREVIOUS_KEYWORDS = {"msgctxt": "pc", "msgid": "pm", "msgid_plural": "pp"}
+
+def _fingerprint(entry: polib.POEntry) -> int:
+    """Hash of every field polib renders; a changed entry gets another one."""
+    return hash((entry.msgid, entry.msgstr, entry.msgctxt, entry.msgid_plural, tuple(sorted(entry.msgstr_plural.items())),
+            tuple(entry.flags), entry.tcomment, entry.comment, tuple(entry.occurrences), entry.obsolete,
+            entry.previous_msgctxt, entry.previous_msgid, entry.previous_msgid_plural))
+
+def _unescape(value: str) -> str:
+    return polib.unescape(value) if "\\" in value else value
+
+def _header_snapshot(po: polib.POFile) -> tuple:
+    return po.header, tuple(po.metadata.items()), bool(po.metadata_is_fuzzy)
+
+def _lines(file_path: str) -> Iterator[Tuple[int, bytes]]:
+    """(offset, raw line) pairs read through mmap; empty files yield nothing."""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = 0
+            for line in iter(mm.readline, b""):
+                yield offset, line
+                offset += len(line)
+
+class POReader:
+    """Parses a catalog lazily into `self.po`; iterate to receive each entry as soon as it is read.
+
+    The metadata entry is consumed into po.metadata/po.header instead of being yielded,
+    exactly like polib.pofile does.
+    """
+
+    def __init__(self, file_path: str, wrapwidth: int = 0):
+        self.file_path = file_path
+        encoding = polib.detect_encoding(file_path)
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = polib.default_encoding
+        self.po = polib.POFile(pofile=file_path, wrapwidth=wrapwidth, encoding=encoding, check_for_duplicates=False)
+        self.po.fpath = file_path
+        self.size = os.path.getsize(file_path)
+        self.position = 0
+        self.done = False
+        self._header_span: Optional[Tuple[int, int]] = None
+
+    def __iter__(self) -> Iterator[polib.POEntry]:
+        first = True
+        # Per entry, in catalog order: start and end offsets, and the fingerprint as read.
+        spans, states = array("q"), array("q")
+        for entry, start, end in self._records():
+            self.position = end
+            if first and entry.msgid == "" and not entry.msgctxt and not entry.obsolete:
+                self._set_metadata(entry)
+                self._header_span = (start, end)
+            else:
+                spans.append(start)
+                spans.append(end)
+                states.append(_fingerprint(entry))
+                self.po.append(entry)
+                yield entry
+            first = False
+        self.po._stream_source = self.file_path
+        self.po._stream_spans, self.po._stream_states = spans, states
+        self.po._stream_entries = array("Q", map(id, self.po))
+        self.po._stream_header = (self._header_span, _header_snapshot(self.po))
+        self.done = True
+
+    def read_all(self) -> polib.POFile:
+        for _ in self:
+            pass
+        return self.po
+
+    def _set_metadata(self, entry: polib.POEntry):
+        self.po.metadata_is_fuzzy = entry.flags
+        key = None
+        for line in entry.msgstr.splitlines():
+            try:
+                key, value = line.split(":", 1)
+                self.po.metadata[key] = value.strip()
+            except (ValueError, KeyError):
+                if key is not None:
+                    self.po.metadata[key] += "\n" + line.strip()
+
+    def _records(self, lines: Optional[Iterable[Tuple[int, bytes]]] = None, state: str = "st") -> Iterator[Tuple[polib.POEntry, int, int]]:
+        """Yield (entry, start, end) with the byte span of each record, following polib's grammar.
+
+        `lines` defaults to the whole file; a slice from the middle of it starts in another
+        state than "st", so its leading comments are not taken for the file's header.
+        """
+        encoding = self.po.encoding
+        entry: Optional[polib.POEntry] = None
+        start = end = 0
+        plural_index = 0
+        header_lines: List[str] = []
+        for linenum, (offset, raw) in enumerate(_lines(self.file_path) if lines is None else lines, 1):
+            line = raw.decode(encoding).strip()
+            if linenum == 1 and line.startswith("\ufeff"):
+                line = line[1:]
+            if not line:
+                continue
+            if line[0] == '"' and entry is not None:
+                # Continuation lines are the bulk of a catalog; keep them off the slow path.
+                self._continue(entry, state, _unescape(line[1:-1]), plural_index)
+                end = offset + len(raw)
+                continue
+            head, _, rest = line.partition(" ")
+            if head == "#~|":
+                continue
+            obsolete = head == "#~" and bool(rest.strip())
+            if obsolete:
+                line = rest.strip()
+                head, _, rest = line.partition(" ")
+
+            # Header comments: plain "#" lines before anything else in the file.
+            if state in ("st", "he") and (head == "#" or head.startswith("##")) and not obsolete:
+                header_lines.append(line[2:])
+                state = "he"
+                if entry is None:
+                    entry, start = polib.POEntry(linenum=linenum), offset
+                end = offset + len(raw)
+                continue
+
+            is_string = line.startswith('"')
+            keyword = head if head in KEYWORDS and rest else ""
+            plural = line.startswith("msgstr[")
+            starts_entry = not is_string and not plural and keyword not in ("msgstr", "msgid_plural")
+            if entry is not None and state in ("ms", "mx") and starts_entry:
+                yield entry, start, end
+                entry = None
+            if entry is None:
+                entry, start = polib.POEntry(linenum=linenum), offset
+            if obsolete:
+                entry.obsolete = 1
+            end = offset + len(raw)
+
+            if keyword:
+                value = _unescape(rest.strip()[1:-1])
+                if keyword == "msgctxt":
+                    entry.msgctxt = value
+                elif keyword == "msgid":
+                    entry.msgid = value
+                elif keyword == "msgid_plural":
+                    entry.msgid_plural = value
+                else:
+                    entry.msgstr = value
+                state = KEYWORDS[keyword]
+            elif plural:
+                plural_index = int(line[7:line.index("]")])
+                entry.msgstr_plural[plural_index] = _unescape(line[line.find('"') + 1:-1])
+                state = "mx"
+            elif is_string:
+                self._continue(entry, state, _unescape(line[1:-1]), plural_index)
+            elif head == "#:":
+                for occurrence in line[3:].split():
+                    path, _, number = occurrence.rpartition(":")
+                    entry.occurrences.append((path, number) if path and number.isdigit() else (occurrence, ""))
+                state = "oc"
+            elif head == "#,":
+                if rest:
+                    entry.flags += [flag.strip() for flag in line[3:].split(",")]
+                state = "fl"
+            elif head == "#.":
+                if rest:
+                    entry.comment = entry.comment + "\n" + line[3:] if entry.comment else line[3:]
+                state = "gc"
+            elif head == "#|":
+                line = line[2:].lstrip()
+                if line.startswith('"'):
+                    self._continue(entry, state, _unescape(line[1:-1]), plural_index)
+                    continue
+                previous, _, rest = line.partition(" ")
+                if previous not in PREVIOUS_KEYWORDS:
+                    raise IOError(f"Syntax error in po file {self.file_path}(line {linenum}): unknown keyword {previous}")
+                state = PREVIOUS_KEYWORDS[previous]
+                setattr(entry, {"pc": "previous_msgctxt", "pm": "previous_msgid", "pp": "previous_msgid_plural"}[state],
+                        _unescape(rest.strip()[1:-1]))
+            elif line.startswith("#"):
+                comment = line.lstrip("#")
+                comment = comment[1:] if comment.startswith(" ") else comment
+                entry.tcomment = entry.tcomment + "\n" + comment if entry.tcomment else comment
+                state = "tc"
+            else:
+                raise IOError(f"Syntax error in po file {self.file_path}(line {linenum})")
+
+            if header_lines and state not in ("st", "he"):
+                self.po.header = "\n".join(header_lines)
+                header_lines = []
+        if header_lines:
+            self.po.header = "\n".join(header_lines)
+        if entry is not None and state not in ("st", "he", "tc", "gc", "oc", "fl"):
+            yield entry, start, end
+
+    @staticmethod
+    def _continue(entry: polib.POEntry, state: str, value: str, plural_index: int):
+        if state == "ct":
+            entry.msgctxt += value
+        elif state == "mi":
+            entry.msgid += value
+        elif state == "mp":
+            entry.msgid_plural += value
+        elif state == "ms":
+            entry.msgstr += value
+        elif state == "mx":
+            entry.msgstr_plural[plural_index] += value
+        elif state == "pc":
+            entry.previous_msgctxt += value
+        elif state == "pm":
+            entry.previous_msgid += value
+        elif state == "pp":
+            entry.previous_msgid_plural += value
+
+class POIndex:
+    """Where each entry of a catalog starts and ends, without keeping the entries themselves.
+
+    scan() walks the file once, from any thread, and rows become available as it goes; a
+    100k-entry catalog costs 1.6 MB of offsets. entry(row) parses one row back from its
+    span. The header's metadata is read into `po` like POReader does.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._reader = POReader(file_path)
+        self.po = self._reader.po
+        self._spans = array("q")
+        self.done = False
+
+    def __len__(self) -> int:
+        # A row counts once both of its offsets are in, so another thread never sees half of one.
+        return len(self._spans) // 2
+
+    def scan(self):
+        first = True
+        for entry, start, end in self._reader._records():
+            if first and entry.msgid == "" and not entry.msgctxt and not entry.obsolete:
+                self._reader._set_metadata(entry)
+            else:
+                self._spans.extend((start, end))
+            first = False
+        self.done = True
+
+    def entry(self, row: int) -> polib.POEntry:
+        start, end = self._spans[2 * row], self._spans[2 * row + 1]
+        with open(self.file_path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start)
+        lines, offset = [], start
+        for raw in data.splitlines(keepends=True):
+            lines.append((offset, raw))
+            offset += len(raw)
+        return next(self._reader._records(lines, state=""))[0]
+
+# How .mo files join the strings of a plural entry; the engine uses the same convention so
+# a plural entry travels through memory, journal and deduplication as a single string.
+PLURAL_SEPARATOR = "\x00"
+
+def source_text(entry: polib.POEntry) -> str:
+    return entry.msgid + PLURAL_SEPARATOR + entry.msgid_plural if entry.msgid_plural else entry.msgid
+
+def translation_text(entry: polib.POEntry) -> str:
+    if entry.msgid_plural:
+        return PLURAL_SEPARATOR.join(entry.msgstr_plural[idx] for idx in sorted(entry.msgstr_plural))
+    return entry.msgstr
+
+def has_translation(entry: polib.POEntry) -> bool:
+    return any(value.strip() for value in entry.msgstr_plural.values()) if entry.msgid_plural else bool(entry.msgstr.strip())
+
+def set_translation(entry: polib.POEntry, value: str):
+    """Write a translation; for a plural entry, value holds its forms joined by PLURAL_SEPARATOR."""
+    if entry.msgid_plural:
+        entry.msgstr_plural = dict(enumerate(value.split(PLURAL_SEPARATOR)))
+    else:
+        entry.msgstr = value
+
+def load(file_path: str, wrapwidth: int = 0) -> polib.POFile:
+    """Drop-in replacement for polib.pofile(file_path, wrapwidth=..., check_for_duplicates=False)."""
+    return POReader(file_path, wrapwidth).read_all()
+
+def _can_patch(po: polib.POFile) -> bool:
+    source = getattr(po, "_stream_source", "")
+    return bool(source) and os.path.isfile(source) and getattr(po, "_stream_entries", None) == array("Q", map(id, po))
+
+def save(po: polib.POFile, output_file: str, mo_file: str = ""):
+    """Write `po` to output_file, copying unchanged entries byte for byte from the file it was read from.
+
+    The file is written to a temporary path and renamed into place, so saving over the
+    source file is safe. With mo_file, the compiled catalog is written there as well.
+    """
+    if not _can_patch(po):
+        po.save(output_file)
+    else:
+        header_span, header_state = po._stream_header
+        if header_span is None and (po.metadata or po.header):
+            po.save(output_file)
+        else:
+            temp_file = output_file + ".tmp"
+            with open(po._stream_source, "rb") as f, open(temp_file, "wb") as out:
+                size = os.fstat(f.fileno()).st_size
+                with (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else _Empty()) as mm:
+                    position = 0
+                    if header_span is not None:
+                        out.write(mm[:header_span[0]])
+                        if _header_snapshot(po) == header_state:
+                            out.write(mm[header_span[0]:header_span[1]])
+                        else:
+                            header = polib.POFile(wrapwidth=po.wrapwidth, encoding=po.encoding)
+                            header.header, header.metadata, header.metadata_is_fuzzy = po.header, po.metadata, po.metadata_is_fuzzy
+                            out.write(str(header).encode(po.encoding))
+                        position = header_span[1]
+                    spans, states = po._stream_spans, po._stream_states
+                    for idx, entry in enumerate(po):
+                        start, end = spans[2 * idx], spans[2 * idx + 1]
+                        out.write(mm[position:start])
+                        if _fingerprint(entry) == states[idx]:
+                            out.write(mm[start:end])
+                        else:
+                            out.write(entry.__unicode__(po.wrapwidth).encode(po.encoding))
+                        position = end
+                    out.write(mm[position:])
+            os.replace(temp_file, output_file)
+    if mo_file:
+        compile_mo(po, mo_file)
+
+class _Empty:
+    """Stand-in for the mmap of an empty source file."""
+
+    def __enter__(self):
+        return b""
+
+    def __exit__(self, *args):
+        return False
+
+def compile_mo(po: polib.POFile, mo_file: str):
+    """Compile the catalog to a binary .mo file (fuzzy and obsolete entries are left out, as msgfmt does)."""
+    po.save_as_mofile(mo_file)
@@ -0,0 +1,167 @@
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Set
+from core.api_manager import APIManager, TranslationError
+from core.rate_limiter import AdaptiveRateLimiter
+from core.telemetry import Telemetry
+from models.api_models import APIModels
+
+class Provider:
+    """One (service, model) endpoint with rolling latency and error statistics."""
+
+    def __init__(self, api: APIManager, model: str, smoothing: float = 0.2):
+        self.api = api
+        self.model = model
+        self.smoothing = smoothing
+        self.latency = 2.0
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.api.service}:{self.model}"
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    @property
+    def weight(self) -> float:
+        return 1.0 / (self.latency * (1.0 + 4.0 * self.error_rate))
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latency += self.smoothing * (latency - self.latency)
+        self.error_rate -= self.smoothing * self.error_rate
+
+    def record_failure(self):
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate += self.smoothing * (1.0 - self.error_rate)
+        if self.consecutive_failures >= 3:
+            # Circuit breaker: back off for 30s, doubling per further failure, at most 5 minutes.
+            self.cooldown_until = time.monotonic() + min(300.0, 30.0 * 2 ** (self.consecutive_failures - 3))
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.name,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency": round(self.latency, 3),
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy
+        }
+
+
+class ProviderPool:
+    """Spreads requests over several services/models and fails over when one errors.
+
+    Providers are picked at random weighted by 1 / (latency * (1 + 4 * error_rate)), so fast,
+    reliable models take most of the traffic while slower ones still add their quota. A
+    provider that fails three times in a row is benched for a growing cooldown. The pool
+    mirrors the APIManager calls the engine uses; the `model` argument of those calls is
+    ignored because the pool chooses the model per request.
+    """
+    LANGUAGES = APIManager.LANGUAGES
+    PROMPT_VERSION = APIManager.PROMPT_VERSION
+
+    def __init__(self, providers: Sequence[Provider], max_attempts: int = 3):
+        if not providers:
+            raise ValueError("A provider pool needs at least one provider")
+        self.providers = list(providers)
+        self.max_attempts = max_attempts
+
+    @classmethod
+    def from_keys(cls, api_keys: Dict[str, str], models: Optional[Dict[str, List[str]]] = None, use_proxy: bool = False,
+                  connection_limit: int = 32, max_retries: int = 1, **api_options) -> "ProviderPool":
+        """Build a pool over every model of every service that has a key (or only the listed models).
+
+        api_options (stream, first_byte_timeout, idle_timeout) are passed on to every APIManager.
+        """
+        rate_limiter = AdaptiveRateLimiter()
+        providers = []
+        for service, api_key in api_keys.items():
+            if not api_key:
+                continue
+            api = APIManager(service, api_key, use_proxy, connection_limit=connection_limit, rate_limiter=rate_limiter, max_retries=max_retries, **api_options)
+            model_ids = (models or {}).get(service) or [model_id for _, model_id in APIModels.get_models(service)]
+            providers.extend(Provider(api, model_id) for model_id in model_ids)
+        return cls(providers)
+
+    @property
+    def model_id(self) -> str:
+        """Stable label for the pool, used where a single model name is expected (memory, journal)."""
+        return "pool:" + "+".join(sorted(provider.name for provider in self.providers))
+
+    @property
+    def telemetry(self) -> Optional[Telemetry]:
+        return self.providers[0].api.telemetry
+
+    @telemetry.setter
+    def telemetry(self, telemetry: Optional[Telemetry]):
+        for api in self._apis():
+            api.telemetry = telemetry
+
+    def _apis(self) -> List[APIManager]:
+        apis: List[APIManager] = []
+        for provider in self.providers:
+            if provider.api not in apis:
+                apis.append(provider.api)
+        return apis
+
+    async def open(self):
+        for api in self._apis():
+            await api.open()
+
+    async def close(self):
+        for api in self._apis():
+            await api.close()
+
+    async def __aenter__(self) -> "ProviderPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def choose(self, exclude: Set[Provider]) -> Optional[Provider]:
+        candidates = [provider for provider in self.providers if provider not in exclude]
+        if not candidates:
+            return None
+        healthy = [provider for provider in candidates if provider.healthy]
+        if not healthy:
+            return min(candidates, key=lambda provider: provider.cooldown_until)
+        return random.choices(healthy, weights=[provider.weight for provider in healthy])[0]
+
+    async def _call(self, method: str, *args, **kwargs):
+        tried: Set[Provider] = set()
+        last_error: Optional[TranslationError] = None
+        for _ in range(self.max_attempts):
+            provider = self.choose(tried)
+            if provider is None:
+                break
+            tried.add(provider)
+            started = time.monotonic()
+            try:
+                result = await getattr(provider.api, method)(*args[:2], provider.model, *args[2:], **kwargs)
+            except TranslationError as e:
+                provider.record_failure()
+                last_error = TranslationError(f"{provider.name}: {e}")
+                continue
+            provider.record_success(time.monotonic() - started)
+            return result
+        raise last_error or TranslationError("No provider available")
+
+    async def translate_text(self, text: str, target_lang: str, model: str = "", context: str = "", **kwargs) -> str:
+        return await self._call("translate_text", text, target_lang, context, **kwargs)
+
+    async def translate_batch(self, texts: List[str], target_lang: str, model: str = "", context: str = "", **kwargs) -> List[Optional[str]]:
+        return await self._call("translate_batch", texts, target_lang, context, **kwargs)
+
+    def stats(self) -> List[dict]:
+        return [provider.stats() for provider in self.providers]
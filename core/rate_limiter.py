@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+from typing import Dict, Hashable, Optional
+
+class TokenBucket:
+    """Classic token bucket; `rate` tokens per second refill up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter:
+    """Per-provider token buckets that halve their rate on 429/503 and creep back up on success."""
+
+    def __init__(self, initial_rate: float = 4.0, min_rate: float = 0.2, max_rate: float = 50.0, burst: float = 4.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.buckets: Dict[Hashable, TokenBucket] = {}
+
+    def bucket(self, key: Hashable) -> TokenBucket:
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(self.initial_rate, self.burst)
+        return self.buckets[key]
+
+    async def acquire(self, key: Hashable):
+        await self.bucket(key).acquire()
+
+    def on_success(self, key: Hashable):
+        bucket = self.bucket(key)
+        bucket.rate = min(self.max_rate, bucket.rate + 0.1)
+
+    def on_throttle(self, key: Hashable, retry_after: Optional[float] = None):
+        bucket = self.bucket(key)
+        bucket.rate = max(self.min_rate, bucket.rate / 2)
+        bucket.tokens = 0
+        if retry_after:
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+
+    @staticmethod
+    def backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(cap, base * 2 ** attempt))
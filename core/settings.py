@@ -39,5 +39,7 @@ class SettingsManager:
     def save_setting(self, key: str, value):
         self.settings.setValue(key, value)
 
-    def load_setting(self, key: str, default_value):
-        return self.settings.value(key, default_value)
\ No newline at end of file
+    def load_setting(self, key: str, default_value, value_type=None):
+        if value_type is None:
+            return self.settings.value(key, default_value)
+        return self.settings.value(key, default_value, value_type)
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""Per-run performance counters: request latency, queue wait, retries, tokens, cache hits and throughput.
+
+Everything is recorded from the engine's event loop, so there is no locking. The GUI
+and CLI read `snapshot()` for live display and `export()` writes it as JSON or CSV.
+"""
+import bisect
+import csv
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+class Histogram:
+    """Fixed log-spaced buckets from 5 ms to ~5 minutes; percentiles are bucket upper bounds."""
+    BOUNDS = [0.005 * 1.25 ** i for i in range(50)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q * self.count)
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.BOUNDS[idx], self.max) if idx < len(self.BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": round(self.percentile(0.5), 4),
+            "p90": round(self.percentile(0.9), 4),
+            "p99": round(self.percentile(0.99), 4),
+            "max": round(self.max, 4)
+        }
+
+class ModelStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.requests = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def snapshot(self) -> dict:
+        return {"requests": self.requests, "failures": self.failures, "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens, "latency": self.latency.snapshot()}
+
+class Telemetry:
+    RATE_WINDOW = 30.0
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.latency = Histogram()
+        self.queue_wait = Histogram()
+        self.limiter_wait = Histogram()
+        self.first_token = Histogram()
+        self.check_wait = Histogram()
+        self.check_time = Histogram()
+        self.write_time = Histogram()
+        self.models: Dict[str, ModelStats] = {}
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.deduplicated = 0
+        self.restored = 0
+        self.cut_off = 0
+        self.check_issues = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedge_cancelled = 0
+        self.hedge_saved = 0.0
+        self.glossary_violations = 0
+        self.fuzzy_prefilled = 0
+        self.fuzzy_hints = 0
+        self.delta_carried = 0
+        self.delta_fuzzy = 0
+        self.entries = 0
+        self.chars = 0
+        self.done = 0
+        self.total = 0
+        self._samples: Deque[Tuple[float, int, int]] = deque()
+
+    def model(self, name: str) -> ModelStats:
+        if name not in self.models:
+            self.models[name] = ModelStats()
+        return self.models[name]
+
+    def record_request(self, model: str, latency: float, ok: bool, usage: Optional[Tuple[int, int]] = None):
+        """One HTTP attempt; usage is (prompt_tokens, completion_tokens) when the response reported it."""
+        stats = self.model(model)
+        self.requests += 1
+        stats.requests += 1
+        self.latency.add(latency)
+        stats.latency.add(latency)
+        if not ok:
+            self.failures += 1
+            stats.failures += 1
+        if usage:
+            self.prompt_tokens += usage[0]
+            self.completion_tokens += usage[1]
+            stats.prompt_tokens += usage[0]
+            stats.completion_tokens += usage[1]
+
+    def record_retry(self, throttled: bool = False):
+        self.retries += 1
+        if throttled:
+            self.throttled += 1
+
+    def record_cache(self, hit: bool):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+
+    def record_translated(self, text: str):
+        self.entries += 1
+        self.chars += len(text)
+
+    def set_progress(self, done: int, total: int):
+        """Track completed entries; samples at most twice a second feed the windowed rate and ETA."""
+        self.done, self.total = done, total
+        now = time.monotonic()
+        if not self._samples or now - self._samples[-1][0] >= 0.5:
+            self._samples.append((now, done, self.chars))
+            while now - self._samples[0][0] > self.RATE_WINDOW and len(self._samples) > 2:
+                self._samples.popleft()
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def rates(self) -> Tuple[float, float]:
+        """(entries/s, source chars/s) over the last RATE_WINDOW seconds, or the whole run when it has ended."""
+        if self.finished is None and len(self._samples) >= 2:
+            (t0, done0, chars0), (t1, done1, chars1) = self._samples[0], self._samples[-1]
+            if t1 > t0:
+                return (done1 - done0) / (t1 - t0), (chars1 - chars0) / (t1 - t0)
+        elapsed = max(self.elapsed, 1e-6)
+        return self.done / elapsed, self.chars / elapsed
+
+    def eta(self) -> Optional[float]:
+        entries_per_second, _ = self.rates()
+        remaining = self.total - self.done
+        if remaining <= 0:
+            return 0.0
+        return remaining / entries_per_second if entries_per_second > 0 else None
+
+    def snapshot(self) -> dict:
+        entries_per_second, chars_per_second = self.rates()
+        eta = self.eta()
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "elapsed": round(self.elapsed, 2),
+            "done": self.done,
+            "total": self.total,
+            "eta": round(eta, 1) if eta is not None else None,
+            "entries_per_second": round(entries_per_second, 2),
+            "chars_per_second": round(chars_per_second, 1),
+            "translated": self.entries,
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "deduplicated": self.deduplicated,
+            "restored": self.restored,
+            "cut_off": self.cut_off,
+            "check_issues": self.check_issues,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_cancelled": self.hedge_cancelled,
+            "hedge_saved": round(self.hedge_saved, 2),
+            "glossary_violations": self.glossary_violations,
+            "fuzzy_prefilled": self.fuzzy_prefilled,
+            "fuzzy_hints": self.fuzzy_hints,
+            "delta_carried": self.delta_carried,
+            "delta_fuzzy": self.delta_fuzzy,
+            "latency": self.latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+            "limiter_wait": self.limiter_wait.snapshot(),
+            "first_token": self.first_token.snapshot(),
+            "check_wait": self.check_wait.snapshot(),
+            "check": self.check_time.snapshot(),
+            "write": self.write_time.snapshot(),
+            "models": {name: stats.snapshot() for name, stats in self.models.items()}
+        }
+
+    @staticmethod
+    def format_duration(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return "?"
+        seconds = int(seconds)
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+        return f"{seconds // 60}m {seconds % 60}s" if seconds >= 60 else f"{seconds}s"
+
+    def summary(self) -> str:
+        """Two status lines for the Progress group."""
+        snapshot = self.snapshot()
+        latency = snapshot["latency"]
+        return (
+            f"Total: {self.total} | Translated: {self.done} | ETA: {self.format_duration(snapshot['eta'])}\n"
+            f"{snapshot['entries_per_second']} entries/s, {snapshot['chars_per_second']} chars/s | "
+            f"latency p50 {latency['p50']}s p99 {latency['p99']}s | {self.requests} requests, {self.retries} retries | "
+            f"tokens {self.prompt_tokens}/{self.completion_tokens} | cache {int(snapshot['cache_hit_rate'] * 100)}%"
+        )
+
+    def export(self, path: str):
+        """Write the snapshot as JSON, or as flattened metric,value rows when path ends in .csv."""
+        snapshot = self.snapshot()
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["metric", "value"])
+                writer.writerows(self._flatten(snapshot))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def _flatten(cls, data: dict, prefix: str = "") -> List[Tuple[str, object]]:
+        rows: List[Tuple[str, object]] = []
+        for key, value in data.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                rows.extend(cls._flatten(value, name + "."))
+            else:
+                rows.append((name, value))
+        return rows
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+def default_path() -> str:
+    """translation_memory.db in the per-user directory of the app's settings (QSettings("MyApp", "Translator"))."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "MyApp", "translation_memory.db")
+
+class TranslationMemory:
+    """On-disk translation cache (SQLite in WAL mode) with an in-memory LRU in front of it.
+
+    Entries are keyed by (msgid, msgctxt, language, model) and tagged with the prompt
+    version that produced them; rows written under another prompt version are dropped
+    when the memory is opened.
+    """
+
+    def __init__(self, db_path: str = "", prompt_version: str = "", max_entries: int = 500000,
+                 lru_size: int = 10000, commit_every: int = 200):
+        self.db_path = db_path = db_path or default_path()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            "msgid TEXT NOT NULL, msgctxt TEXT NOT NULL, language TEXT NOT NULL, model TEXT NOT NULL, "
+            "msgstr TEXT NOT NULL, prompt_version TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (msgid, msgctxt, language, model))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._check_prompt_version()
+
+    def _check_prompt_version(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'prompt_version'").fetchone()
+        if row and row[0] != self.prompt_version:
+            self.invalidate()
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('prompt_version', ?)", (self.prompt_version,))
+        self._conn.commit()
+
+    def get(self, msgid: str, msgctxt: Optional[str], language: str, model: str) -> Optional[str]:
+        key = (msgid, msgctxt or "", language, model)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self._lru[key]
+            row = self._conn.execute(
+                "SELECT msgstr FROM memory WHERE msgid = ? AND msgctxt = ? AND language = ? AND model = ? AND prompt_version = ?",
+                key + (self.prompt_version,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row[0])
+            self._conn.execute(
+                "UPDATE memory SET last_used = ? WHERE msgid = ? AND msgctxt = ? AND language = ? AND model = ?",
+                (time.time(),) + key
+            )
+            self._count_write()
+            return row[0]
+
+    def put(self, msgid: str, msgctxt: Optional[str], language: str, model: str, msgstr: str):
+        key = (msgid, msgctxt or "", language, model)
+        with self._lock:
+            self._remember(key, msgstr)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memory (msgid, msgctxt, language, model, msgstr, prompt_version, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (msgstr, self.prompt_version, time.time())
+            )
+            self._count_write()
+
+    def segments(self, language: str, chunk: int = 5000) -> Iterator[Tuple[str, str, str]]:
+        """Every (msgid, msgstr, msgctxt) stored for a language, across models; feeds the fuzzy index."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT msgid, msgstr, msgctxt FROM memory WHERE language = ?", (language,))
+            rows = cursor.fetchmany(chunk)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunk)
+
+    def _remember(self, key: Tuple[str, str, str, str], msgstr: str):
+        self._lru[key] = msgstr
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _count_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self._commit()
+
+    def _commit(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM memory WHERE rowid IN (SELECT rowid FROM memory ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def invalidate(self, model: Optional[str] = None):
+        """Drop cached translations for one model, or every entry when no model is given."""
+        with self._lock:
+            if model is None:
+                self._conn.execute("DELETE FROM memory")
+                self._lru.clear()
+            else:
+                self._conn.execute("DELETE FROM memory WHERE model = ?", (model,))
+                for key in [key for key in self._lru if key[3] == model]:
+                    del self._lru[key]
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits} hits / {self.misses} misses ({self.hits / total * 100 if total else 0:.0f}% hit rate)"
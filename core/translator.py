@@ -1,89 +1,128 @@
-from PySide6.QtCore import QThread, pyqtSignal
+from PySide6.QtCore import QThread, Signal
 import polib
 import asyncio
-from typing import List, Tuple
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from core.api_manager import APIManager
+from core.engine import TranslationEngine
+from core.provider_pool import ProviderPool
+from core.translation_memory import TranslationMemory
+from core.telemetry import Telemetry
+from core.glossary import Glossary
 
 class TranslationThread(QThread):
-    progress = pyqtSignal(int)
-    log = pyqtSignal(str)
-    finished = pyqtSignal(str, list)
-    preview = pyqtSignal(int, str, str)
+    """Runs a TranslationEngine on its own event loop and reports to the GUI in coalesced batches.
 
-    def __init__(self, file_path: str, dest_language: str, api_key: str, model: str, service: str, context: str = "", 
-                 overwrite: bool = False, translate_placeholders: bool = False, use_proxy: bool = False):
+    Engine callbacks only append to buffers; every FLUSH_INTERVAL seconds the buffers are
+    emitted as one `logs` list, one `previews` list and the latest progress value, so the
+    number of queued Qt events stays flat however many entries finish per second. The
+    telemetry summary line is refreshed once per STATS_INTERVAL.
+    """
+    FLUSH_INTERVAL = 1 / 15
+    STATS_INTERVAL = 1.0
+
+    progress = Signal(int)
+    logs = Signal(list)
+    finished = Signal(str, list)
+    previews = Signal(list)
+    stats = Signal(str)
+
+    def __init__(self, file_path: Union[str, Sequence[str]], dest_language: str, api_key: str, model: str, service: str, context: str = "",
+                 overwrite: bool = False, translate_placeholders: bool = True, use_proxy: bool = False, concurrency: int = 8,
+                 batch_size: int = 20, max_output_tokens: int = 2048, memory: Optional[TranslationMemory] = None,
+                 pool_keys: Optional[Dict[str, str]] = None, compile_mo: bool = False, verbose: bool = True,
+                 glossary: Optional[Glossary] = None, fuzzy_threshold: float = 0.0, fuzzy_hint_threshold: float = 0.0,
+                 previous_files: Sequence[str] = (), hedge_budget: float = 0.0):
         super().__init__()
         self.file_path = file_path
-        self.dest_language = dest_language
-        self.api_key = api_key
-        self.model = model
         self.service = service
-        self.context = context
-        self.overwrite = overwrite
-        self.translate_placeholders = translate_placeholders
-        self.use_proxy = use_proxy
-        self.api = APIManager(service, api_key, use_proxy)
-        self.running = False
-        self.failed_entries: List[Tuple[polib.POEntry, str]] = []
+        self._log_buffer: List[str] = []
+        self._preview_buffer: List[Tuple[int, str, str, bool]] = []
+        self._progress: Optional[int] = None
+        self._stats_at = 0.0
+        if pool_keys:
+            # Load-balance over every model of every service that has a key.
+            self.api = ProviderPool.from_keys(pool_keys, use_proxy=use_proxy, connection_limit=max(1, concurrency))
+            model = self.api.model_id
+        else:
+            self.api = APIManager(service, api_key, use_proxy, connection_limit=max(1, concurrency))
+        self.engine = TranslationEngine(
+            file_path, dest_language, self.api, model, context, overwrite, translate_placeholders,
+            concurrency=concurrency, batch_size=batch_size, max_output_tokens=max_output_tokens, memory=memory, compile_mo=compile_mo,
+            verbose=verbose, glossary=glossary, fuzzy_threshold=fuzzy_threshold, fuzzy_hint_threshold=fuzzy_hint_threshold,
+            previous_files=previous_files, hedge_budget=hedge_budget, on_log=self._log_buffer.append, on_progress=self._set_progress,
+            on_preview=lambda row, original, translation, fuzzy: self._preview_buffer.append((row, original, translation, fuzzy))
+        )
+
+    @property
+    def telemetry(self) -> Telemetry:
+        return self.engine.telemetry
+
+    @property
+    def failed_entries(self) -> List[Tuple[polib.POEntry, str]]:
+        return self.engine.failed_entries
+
+    @property
+    def paused(self) -> bool:
+        return self.engine.paused
+
+    def pause(self):
+        self.engine.pause()
+
+    def resume(self):
+        self.engine.resume()
 
-    async def translate_chunk(self, chunk: List[polib.POEntry], chunk_idx: int, total_chunks: int, chunk_size: int, total: int):
-        translated_count = 0
-        for i, entry in enumerate(chunk):
-            if not self.running:
-                break
-            entry_idx = (chunk_idx - 1) * chunk_size + i
-            if not entry.msgid.strip():
-                entry.msgstr = entry.msgid
-                self.log.emit("ℹ️ Empty text")
-                continue
-            if not self.overwrite and entry.msgstr.strip():
-                self.log.emit(f"⏩ Skipped '{entry.msgid}' (unchanged)")
-                continue
-            if re.search(r'%[sd]|%[0-9]\$[sd]|\{[0-9]+\}|\{[^{}]*?\}|\<[^>]+?\>|\[[^\]]+?\]', entry.msgid) and not self.translate_placeholders:
-                self.log.emit(f"⏩ Skipped '{entry.msgid}' due to variables")
-                continue
+    def stop(self):
+        self.engine.stop()
 
-            self.log.emit(f"🔄 Translating '{entry.msgid}'...")
-            translated = await self.api.translate_text(entry.msgid, self.dest_language, self.model, self.context)
-            entry.msgstr = translated
-            self.log.emit(f"✅ Translated: '{translated}'")
-            self.preview.emit(entry_idx, entry.msgid, translated)
-            translated_count += 1
-            self.progress.emit(int((entry_idx + 1) / total * 100))
-            await asyncio.sleep(0.2)
+    def _set_progress(self, value: int):
+        self._progress = value
 
-        return translated_count
+    def flush(self, final: bool = False):
+        """Emit everything buffered since the last flush; runs on the translation thread."""
+        if self._log_buffer:
+            lines = self._log_buffer[:]
+            del self._log_buffer[:]
+            self.logs.emit(lines)
+        if self._preview_buffer:
+            rows = self._preview_buffer[:]
+            del self._preview_buffer[:]
+            self.previews.emit(rows)
+        if self._progress is not None:
+            self.progress.emit(self._progress)
+            self._progress = None
+        now = time.monotonic()
+        if final or now - self._stats_at >= self.STATS_INTERVAL:
+            self._stats_at = now
+            self.stats.emit(self.telemetry.summary())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            self.flush()
+
+    async def _run(self) -> str:
+        flusher = asyncio.ensure_future(self._flush_periodically())
+        try:
+            async with self.api:
+                output_files, _ = await self.engine.run()
+                if isinstance(self.api, ProviderPool):
+                    for stats in self.api.stats():
+                        self._log_buffer.append(f"📊 {stats['provider']}: {stats['requests']} requests, {stats['failures']} failed, {stats['latency']}s avg latency")
+                # Project runs save each file themselves; only a single-file run hands its output to the preview model.
+                return output_files[0] if output_files and len(self.engine.catalogs) == 1 else ""
+        finally:
+            flusher.cancel()
 
     def run(self):
-        self.running = True
-        self.failed_entries = []
-        self.log.emit("🚀 Translation started...")
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        output_file = ""
         try:
-            po = polib.pofile(self.file_path, wrapwidth=0, check_for_duplicates=False)
-            total = len(po)
-            chunk_size = max(1, min(10, total // 10 + 1))
-            chunks = [po[i:i + chunk_size] for i in range(0, total, chunk_size)]
-            output_file = self.file_path.replace('.po', '_translated.po')
-            translated_count = 0
-
-            for chunk_idx, chunk in enumerate(chunks, 1):
-                if not self.running:
-                    break
-                self.log.emit(f"🔄 Processing chunk {chunk_idx}/{len(chunks)}...")
-                translated_count += loop.run_until_complete(self.translate_chunk(chunk, chunk_idx, len(chunks), chunk_size, total))
-
-            if self.running:
-                po.save(output_file)
-                self.log.emit(f"💾 Translated file saved at {output_file}")
-                self.finished.emit(output_file, self.failed_entries)
-            else:
-                self.log.emit("⛔ Translation stopped")
-                self.finished.emit("", self.failed_entries)
+            output_file = loop.run_until_complete(self._run())
         except Exception as e:
-            self.log.emit(f"❌ Error: {str(e)}")
-            self.finished.emit("", self.failed_entries)
+            self._log_buffer.append(f"❌ Error: {str(e)}")
         finally:
-            self.running = False
-            loop.close()
\ No newline at end of file
+            loop.close()
+            self.flush(final=True)
+            self.finished.emit(output_file, self.failed_entries)
@@ -0,0 +1,101 @@
+"""Checks and normalization of finished translations, run off the event loop.
+
+A Validator holds no state but its configuration and works on plain (source, translation)
+strings, so batches of them can be checked on a thread pool or, with start_pool, on
+worker processes that each received the validator once. Placeholder restoration stays in
+APIManager, since whether a batched answer is usable decides which entries are retried.
+"""
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from core.glossary import Glossary, Term
+from core import placeholders
+from core.po_stream import PLURAL_SEPARATOR
+
+ENTITY = re.compile(r"&(?:[A-Za-z]+|#\d+|#x[0-9A-Fa-f]+);")
+# Arabic letters models tend to write in Persian text, and the Persian letters they stand for.
+PERSIAN_LETTERS = str.maketrans({"ي": "ی", "ك": "ک", "ى": "ی"})
+
+class Issue(NamedTuple):
+    check: str
+    message: str
+    terms: Tuple[Term, ...] = ()
+
+class Validator:
+    MIN_RATIO = 0.25
+    MAX_RATIO = 3.0
+    MIN_RATIO_LENGTH = 20
+
+    def __init__(self, language: str, glossary: Optional[Glossary] = None):
+        self.language = language
+        self.glossary = glossary
+
+    def normalize(self, source: str, translation: str) -> str:
+        if self.language == "fa":
+            translation = translation.translate(PERSIAN_LETTERS)
+        return rewrap(source, translation)
+
+    def check(self, source: str, translation: str) -> Tuple[str, List[Issue]]:
+        """(normalized translation, issues found); plural forms arrive NUL-joined like their sources."""
+        translation = self.normalize(source, translation)
+        issues: List[Issue] = []
+        if self.glossary:
+            terms = self.glossary.violations(source, translation)
+            if terms:
+                expected = ", ".join(f"'{term.source}' → '{term.target}'" for term in terms)
+                issues.append(Issue("glossary", f"expected {expected}", tuple(terms)))
+        # Form by form: an Arabic plural has six forms for the two strings of its source.
+        forms = source_forms(source, translation)
+        for idx, (original, form) in enumerate(forms):
+            if len(original) >= self.MIN_RATIO_LENGTH:
+                ratio = len(form) / len(original)
+                if not self.MIN_RATIO <= ratio <= self.MAX_RATIO:
+                    where = f" (plural form {idx})" if len(forms) > 1 else ""
+                    issues.append(Issue("length", f"{ratio:.1f}x the length of the source{where}"))
+                    break
+        problem = _markup_problem(source, translation)
+        if problem:
+            issues.append(Issue("markup", problem))
+        return translation, issues
+
+    def check_batch(self, pairs: Sequence[Tuple[str, str]]) -> List[Tuple[str, List[Issue]]]:
+        return [self.check(source, translation) for source, translation in pairs]
+
+def source_forms(source: str, translation: str) -> List[Tuple[str, str]]:
+    """(source, form) pairs of a NUL-joined translation: the first form follows the msgid, the others msgid_plural."""
+    sources = source.split(PLURAL_SEPARATOR)
+    return [(sources[min(idx, len(sources) - 1)], form) for idx, form in enumerate(translation.split(PLURAL_SEPARATOR))]
+
+def rewrap(source: str, translation: str) -> str:
+    """Give every form its source's leading and trailing whitespace, as msgfmt -c requires."""
+    def wrap(original: str, form: str) -> str:
+        return original[:len(original) - len(original.lstrip())] + form.strip() + original[len(original.rstrip()):]
+
+    return PLURAL_SEPARATOR.join(wrap(original, form) for original, form in source_forms(source, translation))
+
+def _markup_problem(source: str, translation: str) -> str:
+    """Angle brackets or HTML entities that are not part of the source's markup."""
+    def stray(text: str) -> int:
+        bare = placeholders.PLACEHOLDER.sub("", text)
+        return bare.count("<") + bare.count(">")
+
+    if stray(translation) > stray(source):
+        return "stray '<' or '>' outside the source's tags"
+    missing = set(ENTITY.findall(source)) - set(ENTITY.findall(translation))
+    if missing:
+        return f"HTML entities not kept: {', '.join(sorted(missing))}"
+    return ""
+
+_pool_validator: Optional[Validator] = None
+
+def _init_worker(validator: Validator):
+    global _pool_validator
+    _pool_validator = validator
+
+def check_in_pool(pairs: Sequence[Tuple[str, str]]) -> List[Tuple[str, List[Issue]]]:
+    """Validator.check_batch inside a worker process of start_pool."""
+    return _pool_validator.check_batch(pairs)
+
+def start_pool(validator: Validator, processes: int) -> ProcessPoolExecutor:
+    """Worker processes that receive the validator (and its glossary) once instead of with every batch."""
+    return ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(validator,))
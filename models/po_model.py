@@ -1,35 +1,111 @@
-from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
+from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex, QTimer, Signal
+import threading
+from collections import OrderedDict
 import polib
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
+from core import po_stream
 
 class POTableModel(QAbstractTableModel):
-    def __init__(self, file_path: str):
+    """Table over a catalog's byte-span index; rows are parsed only when the view shows them.
+
+    The index is built on a background thread, and rows reach the view FETCH_SIZE at a time
+    through canFetchMore/fetchMore while it grows, so even very large catalogs open
+    immediately. Memory stays at the index, CACHE_SIZE parsed rows and the translations
+    written into the table, which are kept per row on top of the file.
+    """
+    FETCH_SIZE = 1000
+    CACHE_SIZE = 2000
+    POLL_MS = 100
+    # How the forms of a plural entry are shown and edited in one cell.
+    FORM_SEPARATOR = " | "
+    # Rows indexed so far and whether the whole file has been read; an error message if it could not be.
+    scanned = Signal(int, bool)
+    failed = Signal(str)
+
+    def __init__(self, po_index: Union[po_stream.POIndex, str]):
         super().__init__()
-        self.file_path = file_path
-        self.po_file = None
-        self.entries: List[polib.POEntry] = []
-        self.load_po_file()
+        self.po_index = po_stream.POIndex(po_index) if isinstance(po_index, str) else po_index
+        self.file_path = self.po_index.file_path
+        self.loaded_rows = 0
+        self.error: Optional[str] = None
+        self._cache: "OrderedDict[int, polib.POEntry]" = OrderedDict()
+        self._translations: Dict[int, Tuple[str, bool]] = {}
+        # Set while the view wants rows the index has not reached yet.
+        self._starved = True
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._poll)
+        if not self.po_index.done:
+            threading.Thread(target=self._scan, daemon=True).start()
+            self._timer.start(self.POLL_MS)
+        self._poll()
 
-    def load_po_file(self):
+    def _scan(self):
         try:
-            self.po_file = polib.pofile(self.file_path, wrapwidth=0, check_for_duplicates=False)
-            self.entries = list(self.po_file)
+            self.po_index.scan()
         except Exception as e:
-            print(f"Error loading PO file: {e}")
+            self.error = str(e)
+
+    def _poll(self):
+        if self._starved and self.loaded_rows < self.total_rows():
+            self.fetchMore()
+        finished = self.po_index.done or self.error is not None
+        if finished:
+            self._timer.stop()
+        if self.error is not None:
+            self.failed.emit(self.error)
+        self.scanned.emit(self.total_rows(), finished)
+
+    def total_rows(self) -> int:
+        return len(self.po_index)
 
     def rowCount(self, parent=QModelIndex()) -> int:
-        return len(self.entries)
+        return 0 if parent.isValid() else self.loaded_rows
 
     def columnCount(self, parent=QModelIndex()) -> int:
         return 2
 
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and (self.loaded_rows < self.total_rows() or not self.po_index.done)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_SIZE, self.total_rows() - self.loaded_rows)
+        self._starved = count < self.FETCH_SIZE and not self.po_index.done
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded_rows, self.loaded_rows + count - 1)
+        self.loaded_rows += count
+        self.endInsertRows()
+
+    def entry(self, row: int) -> polib.POEntry:
+        """The entry of a row, parsed from the file (and cached) with any translation written since."""
+        entry = self._cache.get(row)
+        if entry is not None:
+            self._cache.move_to_end(row)
+            return entry
+        entry = self.po_index.entry(row)
+        if row in self._translations:
+            self._translate(entry, *self._translations[row])
+        self._cache[row] = entry
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _translate(entry: polib.POEntry, value: str, fuzzy: bool):
+        po_stream.set_translation(entry, value)
+        if fuzzy and "fuzzy" not in entry.flags:
+            entry.flags.append("fuzzy")
+
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
         if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
             return None
-        row = index.row()
-        col = index.column()
-        entry = self.entries[row]
-        return entry.msgid if col == 0 else entry.msgstr or ""
+        entry = self.entry(index.row())
+        if entry.msgid_plural:
+            text = po_stream.source_text(entry) if index.column() == 0 else po_stream.translation_text(entry)
+            return text.replace(po_stream.PLURAL_SEPARATOR, self.FORM_SEPARATOR)
+        return entry.msgid if index.column() == 0 else entry.msgstr or ""
 
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
         if role != Qt.DisplayRole or orientation != Qt.Horizontal:
@@ -39,15 +115,38 @@ class POTableModel(QAbstractTableModel):
     def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
         if role != Qt.EditRole or not index.isValid() or index.column() != 1:
             return False
-        self.entries[index.row()].msgstr = value
-        self.dataChanged.emit(index, index)
+        if self.entry(index.row()).msgid_plural:
+            value = value.replace(self.FORM_SEPARATOR, po_stream.PLURAL_SEPARATOR)
+        return self.set_translation(index.row(), value)
+
+    def set_translation(self, row: int, value: str, notify: bool = True, fuzzy: bool = False) -> bool:
+        """Update a row whether or not it has been indexed or fetched yet; plural forms come NUL-joined."""
+        if row < 0:
+            return False
+        self._translations[row] = (value, fuzzy or self._translations.get(row, ("", False))[1])
+        entry = self._cache.get(row)
+        if entry is not None:
+            self._translate(entry, value, fuzzy)
+        if notify and row < self.loaded_rows:
+            index = self.index(row, 1)
+            self.dataChanged.emit(index, index)
         return True
 
+    def set_translations(self, rows: List[Tuple[int, str, bool]]):
+        """Apply a batch of (row, translation, fuzzy) with a single dataChanged over the loaded rows it touches."""
+        changed = [row for row, value, fuzzy in rows if self.set_translation(row, value, notify=False, fuzzy=fuzzy) and row < self.loaded_rows]
+        if changed:
+            self.dataChanged.emit(self.index(min(changed), 1), self.index(max(changed), 1), [Qt.DisplayRole, Qt.EditRole])
+
     def flags(self, index: QModelIndex) -> Qt.ItemFlags:
         if not index.isValid():
             return Qt.NoItemFlags
-        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | (Qt.ItemIsEditable if index.column() == 1 else 0)
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | (Qt.ItemIsEditable if index.column() == 1 else Qt.NoItemFlags)
 
     def save(self, file_path: str):
-        if self.po_file:
-            self.po_file.save(file_path)
\ No newline at end of file
+        """Write the file with the table's translations; the only time the whole catalog is parsed."""
+        po = po_stream.load(self.file_path)
+        for row, (value, fuzzy) in self._translations.items():
+            if row < len(po):
+                self._translate(po[row], value, fuzzy)
+        po_stream.save(po, file_path)
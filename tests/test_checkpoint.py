@@ -0,0 +1,52 @@
+import time
+from core.checkpoint import TranslationJournal
+
+def journal(tmp_path, model="model"):
+    return TranslationJournal(str(tmp_path / "a_translated.po.journal"), str(tmp_path / "a.po"), "fa", model)
+
+def test_resume_restores_recorded_translations(tmp_path):
+    first = journal(tmp_path)
+    first.open(resume=False)
+    first.record("Open", None, "باز")
+    first.record("Open", "menu", "بازکردن")
+    first.close()
+    second = journal(tmp_path)
+    restored = second.load()
+    assert restored == {("", "Open"): "باز", ("menu", "Open"): "بازکردن"}
+    second.open(resume=True)
+    second.record("Close", None, "بستن")
+    second.close()
+    assert len(journal(tmp_path).load()) == 3
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    first = journal(tmp_path)
+    first.open(resume=False)
+    first.record("Open", None, "باز")
+    first.close()
+    with open(first.path, "a", encoding="utf-8") as f:
+        f.write('{"c": "", "i": "Clo')
+    assert journal(tmp_path).load() == {("", "Open"): "باز"}
+
+def test_other_job_is_not_resumed(tmp_path):
+    first = journal(tmp_path)
+    first.open(resume=False)
+    first.record("Open", None, "باز")
+    first.close()
+    assert journal(tmp_path, model="other").load() == {}
+
+def test_discard_removes_the_file(tmp_path):
+    first = journal(tmp_path)
+    first.open(resume=False)
+    first.discard()
+    assert journal(tmp_path).load() == {}
+
+def test_quiet_records_are_flushed_once_due(tmp_path):
+    first = TranslationJournal(str(tmp_path / "a_translated.po.journal"), str(tmp_path / "a.po"), "fa", "model", flush_interval=0.05)
+    first.open(resume=False)
+    first.record("Open", None, "باز")
+    first.flush_if_due()
+    assert journal(tmp_path).load() == {}
+    time.sleep(0.06)
+    first.flush_if_due()
+    assert journal(tmp_path).load() == {("", "Open"): "باز"}
+    first.close()
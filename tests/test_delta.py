@@ -0,0 +1,23 @@
+import polib
+from core.delta import PreviousCatalog
+
+def entry(msgid, msgstr="", msgctxt=None, **kwargs):
+    return polib.POEntry(msgid=msgid, msgstr=msgstr, msgctxt=msgctxt, **kwargs)
+
+def test_exact_lookup_respects_msgctxt_and_plurals():
+    previous = PreviousCatalog()
+    previous.add(entry("Open", "باز کن", msgctxt="verb"))
+    previous.add(polib.POEntry(msgid="%d file", msgid_plural="%d files", msgstr_plural={0: "%d فایل", 1: "%d فایل"}))
+    previous.add(entry("Untranslated"))
+    assert previous.get(entry("Open", msgctxt="verb")) == ("باز کن", False)
+    assert previous.get(entry("Open")) is None
+    assert previous.get(polib.POEntry(msgid="%d file", msgid_plural="%d files")) == ("%d فایل\x00%d فایل", False)
+    assert len(previous) == 2
+
+def test_closest_skips_fuzzy_entries_and_plurals():
+    previous = PreviousCatalog(min_similarity=0.8)
+    previous.add(entry("Delete the selected files", "حذف فایل‌ها"))
+    previous.add(entry("Rename the selected files", "تغییر نام فایل‌ها", flags=["fuzzy"]))
+    assert previous.closest(entry("Delete the selected file")).source == "Delete the selected files"
+    assert previous.closest(entry("Rename the selected file")) is None
+    assert previous.closest(polib.POEntry(msgid="Delete the selected file", msgid_plural="Delete the selected files")) is None
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import polib
+import pytest
+from core.checkpoint import TranslationJournal
+from core.engine import TranslationEngine, output_path_for
+from core.translation_memory import TranslationMemory
+
+class FakeAPI:
+    """Answers every string with a prefixed copy, without a network."""
+
+    def __init__(self):
+        self.telemetry = None
+        self.requests = 0
+
+    async def translate_text(self, text, target_lang, model, context="", **kwargs):
+        self.requests += 1
+        return f"fa:{text}"
+
+    async def translate_batch(self, texts, target_lang, model, context="", **kwargs):
+        self.requests += 1
+        return [f"fa:{getattr(text, 'text', text)}" for text in texts]
+
+def write_po(path, msgids):
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8"}
+    for msgid in msgids:
+        po.append(polib.POEntry(msgid=msgid, msgstr=""))
+    po.save(str(path))
+    return str(path)
+
+def test_translates_and_saves_every_file(tmp_path):
+    paths = [write_po(tmp_path / "a.po", ["Open", "Close"]), write_po(tmp_path / "b.po", ["Save", "Open"])]
+    os.makedirs(tmp_path / "out")
+    engine = TranslationEngine(paths, "fa", FakeAPI(), "model", output_dir=str(tmp_path / "out"), verbose=False)
+    saved, written = asyncio.run(engine.run())
+    assert len(saved) == 2 and written == 4
+    assert {entry.msgid: entry.msgstr for entry in polib.pofile(saved[1])} == {"Save": "fa:Save", "Open": "fa:Open"}
+
+def test_failing_check_stage_raises_instead_of_hanging(tmp_path):
+    paths = [write_po(tmp_path / "a.po", ["Open the selected file in a new window"]),
+             write_po(tmp_path / "b.po", [f"Item {i}" for i in range(40)])]
+    out = tmp_path / "out"
+    # Saving a.po from the check stage fails while b.po still has requests to write.
+    os.makedirs(out / "a_translated.po")
+    engine = TranslationEngine(paths, "fa", FakeAPI(), "model", output_dir=str(out), concurrency=1, batch_size=1, verbose=False)
+    with pytest.raises(IsADirectoryError):
+        asyncio.run(asyncio.wait_for(engine.run(), 10))
+
+def test_prefill_from_another_msgctxt_is_fuzzy(tmp_path):
+    po = polib.POFile()
+    po.append(polib.POEntry(msgid="Open recent file", msgctxt="menu", msgstr="باز کردن فایل اخیر"))
+    po.append(polib.POEntry(msgid="Open recent file", msgctxt="toolbar", msgstr=""))
+    po.save(str(tmp_path / "a.po"))
+    api = FakeAPI()
+    engine = TranslationEngine(str(tmp_path / "a.po"), "fa", api, "model", fuzzy_threshold=0.9, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    entry = polib.pofile(saved[0]).find("Open recent file", msgctxt="toolbar")
+    assert entry.msgstr == "باز کردن فایل اخیر" and "fuzzy" in entry.flags
+    assert api.requests == 0
+
+def test_resumes_from_the_journal(tmp_path):
+    path = write_po(tmp_path / "a.po", ["Open", "Close", "Save"])
+    journal = TranslationJournal(TranslationJournal.path_for(output_path_for(path)), path, "fa", "model")
+    journal.open(resume=False)
+    journal.record("Open", None, "باز")
+    journal.close()
+    api = FakeAPI()
+    engine = TranslationEngine(path, "fa", api, "model", batch_size=1, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    assert {entry.msgid: entry.msgstr for entry in polib.pofile(saved[0])} == {"Open": "باز", "Close": "fa:Close", "Save": "fa:Save"}
+    assert api.requests == 2 and engine.telemetry.restored == 1
+    assert not os.path.exists(journal.path)
+
+def test_memory_hit_with_broken_placeholders_is_a_miss(tmp_path):
+    path = write_po(tmp_path / "a.po", ["Hello %s", "Goodbye"])
+    memory = TranslationMemory(str(tmp_path / "memory.db"))
+    memory.put("Hello %s", None, "fa", "model", "سلام")
+    memory.put("Goodbye", None, "fa", "model", "خداحافظ")
+    api = FakeAPI()
+    engine = TranslationEngine(path, "fa", api, "model", memory=memory, translate_placeholders=True, batch_size=1, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    memory.close()
+    assert {entry.msgid: entry.msgstr for entry in polib.pofile(saved[0])} == {"Hello %s": "fa:Hello %s", "Goodbye": "خداحافظ"}
+    assert api.requests == 1
+
+def test_output_dir_keeps_relative_folders(tmp_path):
+    os.makedirs(tmp_path / "a")
+    os.makedirs(tmp_path / "b")
+    paths = [write_po(tmp_path / "a" / "messages.po", ["Open"]), write_po(tmp_path / "b" / "messages.po", ["Close"])]
+    engine = TranslationEngine(paths, "fa", FakeAPI(), "model", output_dir=str(tmp_path / "out"), verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    assert saved == [str(tmp_path / "out" / "a" / "messages_translated.po"), str(tmp_path / "out" / "b" / "messages_translated.po")]
+    assert [entry.msgstr for path in saved for entry in polib.pofile(path)] == ["fa:Open", "fa:Close"]
+
+def test_sent_entry_keeps_its_outer_whitespace(tmp_path):
+    path = write_po(tmp_path / "a.po", ["Hello world\n", "  Hello world"])
+    engine = TranslationEngine(path, "fa", FakeAPI(), "model", batch_size=1, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    assert [entry.msgstr for entry in polib.pofile(saved[0])] == ["fa:Hello world\n", "  fa:Hello world"]
+
+def test_strings_with_placeholders_are_sent_by_default(tmp_path):
+    path = write_po(tmp_path / "a.po", ["Hello %s", "Write <x1/> for %s"])
+    engine = TranslationEngine(path, "fa", FakeAPI(), "model", batch_size=1, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    # The second already contains a mask token, so it could not be restored safely.
+    assert [entry.msgstr for entry in polib.pofile(saved[0])] == ["fa:Hello %s", ""]
+
+def test_delta_carries_previous_translations_over(tmp_path):
+    previous = polib.POFile()
+    previous.metadata = {"Content-Type": "text/plain; charset=UTF-8"}
+    previous.append(polib.POEntry(msgid="Open the selected file", msgstr="باز کردن فایل انتخاب‌شده"))
+    previous.append(polib.POEntry(msgid="Close all windows", msgstr="بستن همه پنجره‌ها", flags=["fuzzy"]))
+    previous.append(polib.POEntry(msgid="Delete the selected files", msgstr="حذف فایل‌های انتخاب‌شده"))
+    previous.save(str(tmp_path / "old.po"))
+    path = write_po(tmp_path / "new.pot", ["Open the selected file", "Close all windows", "Delete the selected file", "Rename"])
+    api = FakeAPI()
+    engine = TranslationEngine(path, "fa", api, "model", previous_files=[str(tmp_path / "old.po")], batch_size=1, verbose=False)
+    saved, _ = asyncio.run(engine.run())
+    entries = {entry.msgid: entry for entry in polib.pofile(saved[0])}
+    unchanged, kept_fuzzy, edited, new = (entries[msgid] for msgid in
+                                          ("Open the selected file", "Close all windows", "Delete the selected file", "Rename"))
+    assert unchanged.msgstr == "باز کردن فایل انتخاب‌شده" and "fuzzy" not in unchanged.flags
+    assert kept_fuzzy.msgstr == "بستن همه پنجره‌ها" and "fuzzy" in kept_fuzzy.flags
+    assert edited.msgstr == "حذف فایل‌های انتخاب‌شده" and "fuzzy" in edited.flags
+    assert edited.previous_msgid == "Delete the selected files"
+    assert new.msgstr == "fa:Rename" and api.requests == 1
+    assert (engine.telemetry.delta_carried, engine.telemetry.delta_fuzzy) == (2, 1)
@@ -0,0 +1,35 @@
+from core.fuzzy_index import FuzzyIndex, distance
+
+def test_distance_is_bounded():
+    assert distance("kitten", "sitting", 5) == 3
+    assert distance("kitten", "sitting", 2) == 3
+    assert distance("same text", "same text", 0) == 0
+
+def test_exact_and_near_matches():
+    index = FuzzyIndex()
+    index.update([("Delete the selected files", "فایل‌های انتخاب‌شده را حذف کن", ""),
+                  ("Open a new window", "باز کردن پنجره جدید", "")])
+    exact = index.lookup("delete the  selected files", 0.8)
+    assert exact.similarity == 1.0 and exact.translation == "فایل‌های انتخاب‌شده را حذف کن"
+    near = index.lookup("Delete the selected file", 0.8)
+    assert near.source == "Delete the selected files" and 0.8 <= near.similarity < 1
+    assert index.lookup("Something unrelated entirely", 0.8) is None
+
+def test_short_strings_are_not_indexed():
+    index = FuzzyIndex()
+    index.add("Open", "باز")
+    assert len(index) == 0 and index.lookup("Open", 0.5) is None
+
+def test_msgctxt_is_part_of_an_exact_match():
+    index = FuzzyIndex()
+    index.add("Open recent file", "فایل اخیر را باز کن", "verb")
+    index.add("Open recent file", "فایل باز اخیر", "adjective")
+    assert index.lookup("Open recent file", 0.8, "adjective").translation == "فایل باز اخیر"
+    other = index.lookup("Open recent file", 0.8, "menu")
+    assert other.similarity == 1.0 and other.context in ("verb", "adjective")
+
+def test_later_translation_replaces_earlier():
+    index = FuzzyIndex()
+    index.add("Delete the selected files", "old")
+    index.add("Delete the selected files", "new")
+    assert len(index) == 1 and index.lookup("Delete the selected files", 0.9).translation == "new"
@@ -0,0 +1,79 @@
+import pytest
+from core.glossary import Glossary, GlossaryError, Term
+
+def glossary(*pairs):
+    return Glossary(Term(source, (target,)) for source, target in pairs)
+
+def test_leftmost_longest_without_overlaps():
+    terms = glossary(("file", "فایل"), ("file manager", "مدیر فایل"), ("manager", "مدیر"), ("save", "ذخیره"))
+    found = [term.source for term in terms.find("Save it in the File Manager, then open the manager")]
+    assert found == ["save", "file manager", "manager"]
+
+def test_overlapping_terms_sharing_a_suffix():
+    terms = glossary(("he", "او"), ("she", "او"), ("hers", "مال او"))
+    assert [term.source for term in terms.find("ushers she")] == ["she"]
+
+def test_whole_words_only():
+    terms = glossary(("log", "گزارش"))
+    assert terms.find("Open the catalog or blog") == []
+    assert [term.source for term in terms.find("Open the log_file or (log)")] == ["log"]
+
+def test_violations_accept_any_alternative():
+    terms = Glossary([Term("file", ("فایل", "پرونده"))])
+    assert terms.violations("Open file", "باز کردن پرونده") == []
+    assert [term.source for term in terms.violations("Open file", "باز کردن سند")] == ["file"]
+
+def test_csv_header_row_is_skipped_and_pipes_split_alternatives(tmp_path):
+    path = tmp_path / "terms.csv"
+    path.write_text("source,target,note\nfile,فایل|پرونده,noun\nsource,منبع\n", encoding="utf-8")
+    terms = Glossary.load([str(path)], "fa").terms
+    assert terms == [Term("file", ("فایل", "پرونده"), "noun"), Term("source", ("منبع",))]
+
+def test_csv_language_header_and_semicolons(tmp_path):
+    path = tmp_path / "terms.csv"
+    path.write_text("en;fa\nfolder;پوشه\nwindow;پنجره\n", encoding="utf-8")
+    assert [term.source for term in Glossary.load([str(path)], "fa").terms] == ["folder", "window"]
+
+def test_later_file_overrides(tmp_path):
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    first.write_text("file,فایل\n", encoding="utf-8")
+    second.write_text("File,پرونده\n", encoding="utf-8")
+    terms = Glossary.load([str(first), str(second)], "fa")
+    assert len(terms) == 1 and terms.terms[0].target == "پرونده"
+
+TBX2 = """<?xml version="1.0"?>
+<martif type="TBX"><text><body>
+  <termEntry id="1">
+    <descrip type="definition">A stored document</descrip>
+    <langSet xml:lang="en"><tig><term>file</term></tig></langSet>
+    <langSet xml:lang="fa-IR"><tig><term>فایل</term></tig><tig><term>پرونده</term></tig></langSet>
+    <langSet xml:lang="de"><tig><term>Datei</term></tig></langSet>
+  </termEntry>
+  <termEntry id="2">
+    <langSet xml:lang="en"><tig><term>untranslated</term></tig></langSet>
+  </termEntry>
+</body></text></martif>"""
+
+TBX3 = """<?xml version="1.0"?>
+<tbx xmlns="urn:iso:std:iso:30042:ed-2" type="TBX-Basic" xml:lang="en"><text><body>
+  <conceptEntry id="1">
+    <langSec xml:lang="en_US"><termSec><term>folder</term></termSec><termSec><term>directory</term></termSec></langSec>
+    <langSec xml:lang="fa"><termSec><term>پوشه</term></termSec></langSec>
+  </conceptEntry>
+</body></text></tbx>"""
+
+def test_tbx2_lang_sets(tmp_path):
+    path = tmp_path / "terms.tbx"
+    path.write_text(TBX2, encoding="utf-8")
+    assert Glossary.load([str(path)], "fa").terms == [Term("file", ("فایل", "پرونده"), "A stored document")]
+
+def test_tbx3_lang_secs(tmp_path):
+    path = tmp_path / "terms.tbx"
+    path.write_text(TBX3, encoding="utf-8")
+    assert Glossary.load([str(path)], "fa").terms == [Term("folder", ("پوشه",)), Term("directory", ("پوشه",))]
+
+def test_unreadable_file_raises_glossary_error(tmp_path):
+    path = tmp_path / "broken.tbx"
+    path.write_text("<martif><termEntry>", encoding="utf-8")
+    with pytest.raises(GlossaryError):
+        Glossary.load([str(path)], "fa")
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from core.hedging import Hedger
+
+def hedger(budget=0.1):
+    hedger = Hedger(budget=budget, percentile=0.9)
+    hedger.MIN_DELAY = 0.01
+    return hedger
+
+async def warm_up(hedger, latency=0.001):
+    async def fast():
+        await asyncio.sleep(latency)
+        return "ok"
+    for _ in range(Hedger.MIN_SAMPLES):
+        await hedger.run("text", fast)
+
+def test_no_backup_before_enough_samples():
+    async def main():
+        h = hedger(budget=1.0)
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+        assert await h.run("text", slow) == "ok"
+        assert h.telemetry.hedged == 0 and h.delay("text") is None
+    asyncio.run(main())
+
+def test_backups_stay_within_budget():
+    async def main():
+        h = hedger(budget=0.1)
+        await warm_up(h)
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+        results = await asyncio.gather(*(h.run("text", slow) for _ in range(90)))
+        assert results == ["ok"] * 90
+        assert 0 < h.telemetry.hedged <= 0.1 * 100
+    asyncio.run(main())
+
+def test_backup_wins_over_stuck_request():
+    async def main():
+        h = hedger(budget=1.0)
+        await warm_up(h)
+        calls = []
+        async def first_stuck():
+            calls.append(1)
+            await asyncio.sleep(10 if len(calls) == 1 else 0.001)
+            return "ok"
+        assert await asyncio.wait_for(h.run("text", first_stuck), 2) == "ok"
+        assert h.telemetry.hedge_wins == 1 and h.telemetry.hedge_cancelled == 1
+    asyncio.run(main())
+
+def test_backup_takes_a_slot():
+    async def main():
+        h = hedger(budget=1.0)
+        await warm_up(h)
+        slot = asyncio.Semaphore(2)
+        in_flight, peak = 0, 0
+        async def call():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.05)
+                return "ok"
+            finally:
+                in_flight -= 1
+        async def request():
+            async with slot:
+                return await h.run("text", call, slot=slot)
+        await asyncio.gather(*(request() for _ in range(6)))
+        assert h.telemetry.hedged > 0 and peak <= 2
+    asyncio.run(main())
+
+def test_only_successful_latencies_are_recorded():
+    async def main():
+        h = hedger()
+        async def failing():
+            await asyncio.sleep(0.001)
+            raise RuntimeError("provider error")
+        for _ in range(Hedger.MIN_SAMPLES):
+            with pytest.raises(RuntimeError):
+                await h.run("text", failing)
+        assert h.delay("text") is None
+        await warm_up(h)
+        assert h.delay("text") is not None
+    asyncio.run(main())
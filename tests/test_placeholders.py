@@ -0,0 +1,45 @@
+import pytest
+from core import placeholders
+from core.placeholders import PlaceholderError
+
+@pytest.mark.parametrize("text", [
+    "Hello %s, you have %d new messages",
+    "Moved %1$s to %2$s",
+    "Saved {count} files in {0}",
+    "Click <a href=\"/help\">here</a> for <b>help</b>",
+    "[caption id=\"1\"]Photo[/caption] 100%%",
+])
+def test_mask_unmask_round_trip(text):
+    masked, found = placeholders.mask(text)
+    assert not placeholders.has_placeholders(masked.replace("<x", "x"))
+    assert placeholders.unmask(masked, found) == text
+
+def test_tokens_may_move():
+    masked, found = placeholders.mask("Moved %1$s to %2$s")
+    assert placeholders.unmask("<x2/> <- <x1/>", found) == "%2$s <- %1$s"
+
+def test_plural_shares_numbering():
+    singular, found = placeholders.mask("%d file in {dir}")
+    plural, found = placeholders.mask("%d files in {dir}", found)
+    assert singular == "<x1/> file in <x2/>" and plural == "<x1/> files in <x2/>"
+    assert placeholders.unmask("یک فایل در <x2/>", found, partial=True) == "یک فایل در {dir}"
+
+@pytest.mark.parametrize("answer", [
+    "<x1/> پیام",                 # lost
+    "<x1/> <x1/> <x2/>",          # duplicated
+    "<x2/> و <x1/>",              # unnumbered printf reordered
+    "<x1/> <x2/> <x3/>",          # unknown token
+])
+def test_unmask_rejects_broken_answers(answer):
+    _, found = placeholders.mask("Hello %s, you have %d new messages")
+    with pytest.raises(PlaceholderError):
+        placeholders.unmask(answer, found)
+
+def test_unmask_rejects_crossed_tags():
+    _, found = placeholders.mask("<b><i>Bold italic</i></b>")
+    with pytest.raises(PlaceholderError):
+        placeholders.unmask("<x1/><x2/>متن<x4/><x3/>", found)
+
+def test_text_with_literal_tokens_cannot_be_masked():
+    assert placeholders.can_mask("Hello %s <b>you</b>")
+    assert not placeholders.can_mask("Type <x1/> to insert the first argument")
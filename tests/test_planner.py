@@ -0,0 +1,30 @@
+from core.planner import ChunkPlanner
+
+def test_every_text_planned_once():
+    texts = [f"String number {i} " * (i % 7 + 1) for i in range(100)]
+    batches = ChunkPlanner(max_output_tokens=512, max_items=10).plan(texts)
+    assert sorted(idx for batch in batches for idx in batch) == list(range(100))
+
+def test_batches_respect_budget_and_item_limit():
+    planner = ChunkPlanner(max_output_tokens=512, max_items=10)
+    texts = [f"String number {i} " * (i % 7 + 1) for i in range(100)]
+    for batch in planner.plan(texts):
+        assert len(batch) <= 10
+        assert len(batch) == 1 or sum(planner.cost(texts[idx]) for idx in batch) <= planner.budget
+
+def test_heaviest_batch_first_and_original_order_inside():
+    planner = ChunkPlanner(max_output_tokens=512, max_items=10)
+    texts = ["Short"] * 5 + ["A long help paragraph " * 30] + ["Short"] * 5
+    batches = planner.plan(texts)
+    assert 5 in batches[0] and len(batches) > 1
+    loads = [sum(planner.cost(texts[idx]) for idx in batch) for batch in batches]
+    assert loads == sorted(loads, reverse=True)
+    assert all(batch == sorted(batch) for batch in batches)
+
+def test_plural_forms_weigh_more():
+    planner = ChunkPlanner(max_output_tokens=200, max_items=20)
+    texts = ["%d files were copied to the folder"] * 4
+    assert len(planner.plan(texts, [6] * 4)) > len(planner.plan(texts, [1] * 4))
+
+def test_empty_input():
+    assert ChunkPlanner().plan([]) == []
@@ -0,0 +1,61 @@
+import time
+import polib
+import pytest
+from core import po_stream
+
+def make_catalog(path, count=2500):
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8"}
+    for i in range(count):
+        po.append(polib.POEntry(msgid=f"Message {i}", msgstr="" if i % 2 else f"پیام {i}", tcomment=f"comment {i}",
+                                occurrences=[("main.py", str(i))]))
+    po.append(polib.POEntry(msgid="%d file", msgid_plural="%d files", msgstr_plural={0: "", 1: ""}))
+    po.save(str(path))
+    return str(path)
+
+def test_index_parses_rows_like_polib(tmp_path):
+    path = make_catalog(tmp_path / "a.po")
+    index = po_stream.POIndex(path)
+    index.scan()
+    parsed = polib.pofile(path)
+    assert len(index) == len(parsed) and index.po.metadata == parsed.metadata
+    for row in (0, 1, 1234, len(parsed) - 1):
+        entry = index.entry(row)
+        assert (entry.msgid, entry.msgstr, entry.msgid_plural, entry.tcomment, entry.occurrences) == \
+               (parsed[row].msgid, parsed[row].msgstr, parsed[row].msgid_plural, parsed[row].tcomment, parsed[row].occurrences)
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+def wait_for_index(app, model):
+    deadline = time.monotonic() + 10
+    while model._timer.isActive() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+def test_model_fetches_rows_as_the_index_grows(app, tmp_path):
+    from models.po_model import POTableModel
+    model = POTableModel(make_catalog(tmp_path / "a.po"))
+    wait_for_index(app, model)
+    assert model.total_rows() == 2501 and model.rowCount() == POTableModel.FETCH_SIZE
+    while model.canFetchMore():
+        model.fetchMore()
+    assert model.rowCount() == 2501
+    assert model.data(model.index(2, 1)) == "پیام 2"
+    assert model.data(model.index(2500, 0)) == "%d file | %d files"
+    assert len(model._cache) <= POTableModel.CACHE_SIZE
+
+def test_translations_survive_the_cache_and_save(app, tmp_path):
+    from models.po_model import POTableModel
+    model = POTableModel(make_catalog(tmp_path / "a.po"))
+    wait_for_index(app, model)
+    model.set_translations([(1, "پیام یک", True), (2500, "%d فایل\x00%d فایل", False)])
+    model._cache.clear()
+    assert model.data(model.index(1, 1)) == "پیام یک"
+    model.save(str(tmp_path / "out.po"))
+    saved = polib.pofile(str(tmp_path / "out.po"))
+    assert saved[1].msgstr == "پیام یک" and "fuzzy" in saved[1].flags
+    assert saved[2500].msgstr_plural == {0: "%d فایل", 1: "%d فایل"}
@@ -0,0 +1,59 @@
+import polib
+from core import po_stream
+
+def make_source(path):
+    po = polib.POFile()
+    po.metadata = {"Content-Type": "text/plain; charset=UTF-8", "Plural-Forms": "nplurals=2; plural=(n != 1);"}
+    po.append(polib.POEntry(msgid="Open", msgstr="", occurrences=[("main.py", "10")]))
+    po.append(polib.POEntry(msgid="Close", msgctxt="menu", msgstr="", comment="Closes the window"))
+    po.append(polib.POEntry(msgid="%d file", msgid_plural="%d files", msgstr_plural={0: "", 1: ""}, flags=["c-format"]))
+    po.append(polib.POEntry(msgid="A long line " * 12 + "with \"quotes\"", msgstr="Already translated"))
+    po.save(str(path))
+    return str(path)
+
+def translate(po):
+    for entry in po:
+        if entry.msgid == "Open":
+            po_stream.set_translation(entry, "باز")
+        elif entry.msgid_plural:
+            po_stream.set_translation(entry, "%d فایل\x00%d فایل")
+            entry.flags.append("fuzzy")
+
+def test_reader_matches_polib(tmp_path):
+    source = make_source(tmp_path / "a.po")
+    streamed, parsed = po_stream.load(source), polib.pofile(source)
+    assert [po_stream.source_text(entry) for entry in streamed] == [po_stream.source_text(entry) for entry in parsed]
+    assert streamed.metadata == parsed.metadata
+
+def test_span_save_matches_polib_save(tmp_path):
+    source = make_source(tmp_path / "a.po")
+    streamed, parsed = po_stream.load(source), polib.pofile(source)
+    translate(streamed)
+    translate(parsed)
+    po_stream.save(streamed, str(tmp_path / "streamed.po"))
+    parsed.save(str(tmp_path / "polib.po"))
+    assert (tmp_path / "streamed.po").read_bytes() == (tmp_path / "polib.po").read_bytes()
+
+def test_unchanged_entries_are_copied_verbatim(tmp_path):
+    source = tmp_path / "a.po"
+    source.write_text('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+                      '#  odd   spacing kept\nmsgid "Open"\nmsgstr ""\n\nmsgid "Close"\nmsgstr ""\n', encoding="utf-8")
+    po = po_stream.load(str(source))
+    po_stream.set_translation(po[1], "بستن")
+    po_stream.save(po, str(tmp_path / "out.po"))
+    saved = (tmp_path / "out.po").read_text(encoding="utf-8")
+    assert "#  odd   spacing kept\nmsgid \"Open\"" in saved and 'msgstr "بستن"' in saved
+
+def test_plural_translation_round_trip(tmp_path):
+    po = po_stream.load(make_source(tmp_path / "a.po"))
+    translate(po)
+    po_stream.save(po, str(tmp_path / "out.po"))
+    entry = polib.pofile(str(tmp_path / "out.po")).find("%d file")
+    assert po_stream.translation_text(entry) == "%d فایل\x00%d فایل" and "fuzzy" in entry.flags
+
+def test_flag_only_edit_is_rendered(tmp_path):
+    po = po_stream.load(make_source(tmp_path / "a.po"))
+    po[3].flags.append("fuzzy")
+    po_stream.save(po, str(tmp_path / "out.po"))
+    assert "fuzzy" in polib.pofile(str(tmp_path / "out.po"))[3].flags
+    assert not hasattr(po[3], "_stream_state")
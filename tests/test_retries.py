@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import polib
+import pytest
+from benchmarks.mock_llm import MockLLM, MockSettings, base_url
+from core.api_manager import APIManager
+from core.engine import TranslationEngine
+from core.rate_limiter import AdaptiveRateLimiter
+from tests.test_engine import write_po
+
+class Headers:
+    def __init__(self, **headers):
+        self.headers = {key.replace("_", "-"): value for key, value in headers.items()}
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(AdaptiveRateLimiter, "backoff", staticmethod(lambda attempt, base=1.0, cap=60.0: 0.0))
+
+def test_retry_after_seconds():
+    assert APIManager._retry_after(Headers(Retry_After="2.5")) == 2.5
+    assert APIManager._retry_after(Headers(Retry_After="-3")) == 0.0
+
+def test_retry_after_http_date():
+    value = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 28 <= APIManager._retry_after(Headers(Retry_After=value)) <= 30
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert APIManager._retry_after(Headers(Retry_After=past)) == 0.0
+
+def test_retry_after_missing_or_garbage():
+    assert APIManager._retry_after(Headers()) is None
+    assert APIManager._retry_after(Headers(Retry_After="soon")) is None
+
+def test_throttle_halves_rate_and_blocks():
+    limiter = AdaptiveRateLimiter(initial_rate=4.0, min_rate=1.5)
+    limiter.on_throttle("key", 5.0)
+    bucket = limiter.bucket("key")
+    assert bucket.rate == 2.0 and bucket.tokens == 0
+    assert bucket.blocked_until > time.monotonic() + 4
+    limiter.on_throttle("key")
+    assert bucket.rate == 1.5
+
+def serve(settings, main):
+    async def run():
+        mock = MockLLM(settings)
+        port = await mock.start()
+        try:
+            return await main(mock, base_url("openrouter", port))
+        finally:
+            await mock.stop()
+    return asyncio.run(run())
+
+def test_429_then_success_waits_for_retry_after():
+    async def main(mock, url):
+        async with APIManager("openrouter", "key", base_url=url, max_retries=3) as api:
+            started = time.monotonic()
+            result = await api.translate_text("Save changes", "fa", "test/model")
+            rate = api.rate_limiter.bucket(("openrouter", "test/model")).rate
+            return result, time.monotonic() - started, rate, mock.throttled, mock.requests
+    # Seed 2 throttles the first request and lets the second through.
+    settings = MockSettings(latency=0.0, jitter=0.0, throttle_rate=0.5, retry_after=0.3, seed=2)
+    result, elapsed, rate, throttled, requests = serve(settings, main)
+    assert result == "Persian: Save changes"
+    assert throttled == 1 and requests == 2
+    assert elapsed >= 0.3 and rate < AdaptiveRateLimiter().initial_rate
+
+def test_failed_entries_carry_the_reason(tmp_path):
+    async def main(mock, url):
+        api = APIManager("openrouter", "key", base_url=url, max_retries=1)
+        engine = TranslationEngine(write_po(tmp_path / "a.po", ["Save changes"]), "fa", api, "test/model", verbose=False)
+        async with api:
+            await engine.run()
+        return engine.failed_entries
+    failed = serve(MockSettings(latency=0.0, jitter=0.0, throttle_rate=1.0, retry_after=0.0), main)
+    assert [entry.msgid for entry, _ in failed] == ["Save changes"]
+    assert "HTTP 429" in failed[0][1] and "after 2 attempts" in failed[0][1]
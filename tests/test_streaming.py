@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from benchmarks.mock_llm import MockLLM, MockSettings, base_url
+from core.api_manager import APIManager, OutputTooLong, TranslationError
+from core.rate_limiter import AdaptiveRateLimiter
+from core.telemetry import Telemetry
+
+TEXT = "Save changes"
+ANSWER = "Persian: Save changes"
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(AdaptiveRateLimiter, "backoff", staticmethod(lambda attempt, base=1.0, cap=60.0: 0.0))
+
+def translate(max_retries=0, first_byte_timeout=1.0, idle_timeout=1.0, **settings):
+    """Translate TEXT through a streaming APIManager against a fresh mock; returns (answer or error, mock, telemetry)."""
+    async def main():
+        mock = MockLLM(MockSettings(latency=0.0, jitter=0.0, **settings))
+        port = await mock.start()
+        api = APIManager("openrouter", "key", base_url=base_url("openrouter", port), max_retries=max_retries,
+                         first_byte_timeout=first_byte_timeout, idle_timeout=idle_timeout)
+        api.telemetry = Telemetry()
+        try:
+            async with api:
+                try:
+                    result = await api.translate_text(TEXT, "fa", "test/model")
+                except TranslationError as e:
+                    result = e
+        finally:
+            await mock.stop()
+        return result, mock, api.telemetry
+    return asyncio.run(main())
+
+def test_plain_stream():
+    result, mock, telemetry = translate()
+    assert result == ANSWER and mock.requests == 1
+
+def test_keepalive_comments_are_not_the_first_byte():
+    result, mock, _ = translate(first_byte_timeout=0.3, first_token_delay=0.6)
+    assert isinstance(result, TranslationError) and "TimeoutError" in str(result)
+    assert mock.requests == 1
+
+def test_first_token_within_the_bound_behind_keepalives():
+    result, _, telemetry = translate(first_byte_timeout=1.0, first_token_delay=0.2)
+    assert result == ANSWER
+    assert telemetry.first_token.count == 1
+
+def test_idle_timeout_after_the_first_token():
+    result, mock, _ = translate(first_byte_timeout=5.0, idle_timeout=0.2, stall=0.6)
+    assert isinstance(result, TranslationError) and "TimeoutError" in str(result)
+    assert mock.requests == 1
+
+def test_pause_shorter_than_idle_timeout():
+    assert translate(idle_timeout=0.5, stall=0.1)[0] == ANSWER
+
+def test_runaway_stream_is_cut_off_and_not_retried():
+    result, mock, telemetry = translate(max_retries=3, runaway_rate=1.0)
+    assert isinstance(result, OutputTooLong)
+    assert mock.requests == 1 and mock.runaways == 1
+    assert telemetry.cut_off == 1
+
+def test_error_event_mid_stream_is_retried():
+    result, mock, _ = translate(max_retries=2, stream_error_rate=1.0)
+    assert isinstance(result, TranslationError) and not isinstance(result, OutputTooLong)
+    assert "stream error" in str(result) and "upstream connection lost" in str(result)
+    assert mock.requests == 3 and mock.stream_errors == 3
+
+def test_error_event_then_success():
+    # Seed 1 makes the first answer fail mid-stream and the second complete.
+    result, mock, _ = translate(max_retries=2, stream_error_rate=0.5, seed=1)
+    assert result == ANSWER
+    assert mock.stream_errors == 1 and mock.requests == 2
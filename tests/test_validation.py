@@ -0,0 +1,21 @@
+from core.validation import Validator, rewrap
+
+def test_normalize_keeps_the_source_whitespace():
+    translation, _ = Validator("fa").check("Hello world\n", "  سلام دنيا ")
+    assert translation == "سلام دنیا\n"
+
+def test_plural_forms_follow_their_own_source():
+    source = " One file\x00%d files\n"
+    assert rewrap(source, "یک فایل\x00%d فایل\x00%d فایل") == " یک فایل\x00%d فایل\n\x00%d فایل\n"
+
+def test_length_is_compared_form_by_form():
+    validator = Validator("ar")
+    source = "One comment was posted\x00%d comments were posted"
+    forms = ["تم نشر تعليق واحد اليوم هنا", "تم نشر %d تعليقات اليوم هنا!"] * 3
+    assert validator.check(source, "\x00".join(forms))[1] == []
+    forms[4] = "تم نشر %d تعليقات " * 10
+    issues = validator.check(source, "\x00".join(forms))[1]
+    assert [issue.check for issue in issues] == ["length"] and "plural form 4" in issues[0].message
+
+def test_length_of_a_singular():
+    assert Validator("fa").check("Delete the selected files now", "حذف")[1][0].check == "length"
@@ -1,6 +1,5 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QTableView
-from PySide6.QtGui import QFont
-from models.po_model import POTableModel
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QTableView, QHeaderView
+from PySide6.QtGui import QFont, QStandardItemModel, QStandardItem
 
 class ContextDialog(QDialog):
     def __init__(self, parent=None):
@@ -27,9 +26,12 @@ class RetryDialog(QDialog):
         layout = QVBoxLayout()
         layout.addWidget(QLabel(f"{len(failed_entries)} entries failed. Retry?"))
         self.table = QTableView()
-        self.table_model = POTableModel(self.failed_entries[0][0].po_file.filepath if failed_entries else "")
+        self.table_model = QStandardItemModel(0, 2)
+        self.table_model.setHorizontalHeaderLabels(["Original Text", "Reason"])
+        for entry, reason in failed_entries:
+            self.table_model.appendRow([QStandardItem(entry.msgid), QStandardItem(reason)])
         self.table.setModel(self.table_model)
-        self.table.horizontalHeader().setSectionResizeMode(1)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setFont(QFont("Arial", 12))
         layout.addWidget(self.table)
         buttons = QHBoxLayout()
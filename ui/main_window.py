@@ -1,9 +1,12 @@
-from PySide6.QtWidgets import QMainWindow, QFileDialog, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QComboBox, QLineEdit, QTextEdit, QProgressBar, QLabel, QCheckBox, QTableView, QGroupBox, QFormLayout, QTabWidget
+from PySide6.QtWidgets import QMainWindow, QFileDialog, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, QComboBox, QLineEdit, QPlainTextEdit, QProgressBar, QLabel, QCheckBox, QTableView, QGroupBox, QFormLayout, QTabWidget, QSpinBox, QHeaderView
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QIcon
 from core.file_manager import FileManager
 from core.api_manager import APIManager
 from core.translator import TranslationThread
+from core.key_validator import KeyValidator
+from core.translation_memory import TranslationMemory
+from core.glossary import Glossary, GlossaryError
 from core.settings import SettingsManager
 from core.logger import Logger
 from ui.dialogs import ContextDialog, RetryDialog
@@ -11,9 +14,12 @@ from ui.styles import StyleManager
 from models.po_model import POTableModel
 from models.api_models import APIModels
 import os
-import asyncio
 
 class MainWindow(QMainWindow):
+    LOG_LINES = 5000
+    FUZZY_HINT_SIMILARITY = 0.6
+    HEDGE_BUDGET = 0.1
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PO Translator")
@@ -23,9 +29,15 @@ class MainWindow(QMainWindow):
         self.settings = SettingsManager()
         self.logger = Logger()
         self.style_manager = StyleManager()
+        self.translation_memory = TranslationMemory(prompt_version=APIManager.PROMPT_VERSION)
         self.translation_thread = None
+        self.key_validator = KeyValidator()
+        self.key_validator.validated.connect(self.key_validated)
+        self.pending_start = None
         self.po_model = None
         self.context = ""
+        self.glossary_paths = []
+        self.previous_paths = []
         self.setup_ui()
         self.load_settings()
 
@@ -97,12 +109,56 @@ class MainWindow(QMainWindow):
         self.language_combo.addItem("Arabic (ar)", "ar")
         self.translate_placeholders_checkbox = QCheckBox("Translate Sentences with Variables")
         self.overwrite_checkbox = QCheckBox("Overwrite Existing Translations")
+        self.use_memory_checkbox = QCheckBox("Reuse Translation Memory")
+        self.use_memory_checkbox.setChecked(True)
+        self.balance_checkbox = QCheckBox("Balance Across All Models With Saved Keys")
+        self.compile_mo_checkbox = QCheckBox("Also Compile .mo File")
+        self.hedge_checkbox = QCheckBox("Hedge Slow Requests")
+        self.hedge_checkbox.setToolTip("Send a backup copy of requests that are much slower than usual (at most 10% extra requests)")
+        self.verbose_log_checkbox = QCheckBox("Log Every Entry")
+        self.verbose_log_checkbox.setChecked(True)
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 32)
+        self.concurrency_spin.setValue(8)
+        self.batch_size_spin = QSpinBox()
+        self.batch_size_spin.setRange(1, 50)
+        self.batch_size_spin.setValue(20)
+        self.fuzzy_spin = QSpinBox()
+        self.fuzzy_spin.setRange(0, 100)
+        self.fuzzy_spin.setSuffix("%")
+        self.fuzzy_spin.setSpecialValueText("Off")
+        self.fuzzy_spin.setToolTip("Pre-fill entries from earlier translations at least this similar and mark them fuzzy")
         context_button = QPushButton("Set Context")
         context_button.clicked.connect(self.open_context_dialog)
+        glossary_layout = QHBoxLayout()
+        self.glossary_button = QPushButton("Set Glossary")
+        self.glossary_button.clicked.connect(self.select_glossary)
+        clear_glossary_button = QPushButton("Clear Glossary")
+        clear_glossary_button.clicked.connect(lambda: self.set_glossary_paths([]))
+        glossary_layout.addWidget(self.glossary_button)
+        glossary_layout.addWidget(clear_glossary_button)
+        previous_layout = QHBoxLayout()
+        self.previous_button = QPushButton("Set Previous Translation")
+        self.previous_button.setToolTip("Delta mode: carry over the translations of an earlier .po and translate only new or changed entries")
+        self.previous_button.clicked.connect(self.select_previous)
+        clear_previous_button = QPushButton("Clear Previous")
+        clear_previous_button.clicked.connect(lambda: self.set_previous_paths([]))
+        previous_layout.addWidget(self.previous_button)
+        previous_layout.addWidget(clear_previous_button)
         trans_layout.addRow("Target Language:", self.language_combo)
         trans_layout.addRow("", self.translate_placeholders_checkbox)
         trans_layout.addRow("", self.overwrite_checkbox)
+        trans_layout.addRow("", self.use_memory_checkbox)
+        trans_layout.addRow("", self.balance_checkbox)
+        trans_layout.addRow("", self.compile_mo_checkbox)
+        trans_layout.addRow("", self.hedge_checkbox)
+        trans_layout.addRow("", self.verbose_log_checkbox)
+        trans_layout.addRow("Parallel Requests:", self.concurrency_spin)
+        trans_layout.addRow("Strings per Request:", self.batch_size_spin)
+        trans_layout.addRow("Fuzzy Pre-fill:", self.fuzzy_spin)
         trans_layout.addRow("", context_button)
+        trans_layout.addRow("", glossary_layout)
+        trans_layout.addRow("", previous_layout)
         trans_tab.setLayout(trans_layout)
         tabs.addTab(trans_tab, "Translation Settings")
 
@@ -132,17 +188,23 @@ class MainWindow(QMainWindow):
         self.progress_bar = QProgressBar()
         self.progress_bar.setFormat("%p%")
         self.status_summary = QLabel("Total: 0 | Translated: 0 | ETA: 0s")
+        self.status_summary.setWordWrap(True)
+        self.export_stats_button = QPushButton("Export Stats")
+        self.export_stats_button.setEnabled(False)
+        self.export_stats_button.clicked.connect(self.export_stats)
         progress_layout.addWidget(self.progress_bar)
         progress_layout.addWidget(self.status_summary)
+        progress_layout.addWidget(self.export_stats_button)
         progress_group.setLayout(progress_layout)
         left_layout.addWidget(progress_group)
 
         # Log Group
         log_group = QGroupBox("Operation Log")
         log_layout = QVBoxLayout()
-        self.log_box = QTextEdit()
+        self.log_box = QPlainTextEdit()
         self.log_box.setReadOnly(True)
-        self.logger.set_ui_handler(self.log_box.append)
+        self.log_box.setMaximumBlockCount(self.LOG_LINES)
+        self.logger.set_ui_handler(self.log_box.appendPlainText)
         clear_log_button = QPushButton("Clear Log")
         clear_log_button.clicked.connect(self.log_box.clear)
         log_layout.addWidget(self.log_box)
@@ -155,7 +217,7 @@ class MainWindow(QMainWindow):
         preview_group = QGroupBox("Translation Preview")
         preview_layout = QVBoxLayout()
         self.preview_table = QTableView()
-        self.preview_table.horizontalHeader().setSectionResizeMode(1)
+        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         preview_layout.addWidget(self.preview_table)
         preview_group.setLayout(preview_layout)
         right_layout.addWidget(preview_group)
@@ -194,13 +256,24 @@ class MainWindow(QMainWindow):
             self.logger.log("No API key provided", "error")
             return
         service = "openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini"
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        api_manager = APIManager(service, api_key)
-        is_valid, message = loop.run_until_complete(api_manager.validate_api_key())
-        self.key_status_label.setText(message)
+        self.key_status_label.setText("Checking API key...")
+        self.test_key_button.setEnabled(False)
+        self.key_validator.validate(service, api_key, force=True)
+
+    def key_validated(self, service: str, api_key: str, is_valid: bool, message: str):
+        current_service = "openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini"
+        if (service, api_key) == (current_service, self.api_key_input.text().strip()):
+            self.key_status_label.setText(message)
+            self.test_key_button.setEnabled(True)
+        if self.pending_start == (service, api_key):
+            self.pending_start = None
+            if is_valid:
+                self.start_translation(service)
+            else:
+                self.logger.log("Invalid API key", "error")
+                self.translate_button.setEnabled(True)
+            return
         self.logger.log(f"{'✅' if is_valid else '❌'} {message}")
-        loop.close()
 
     def on_api_service_changed(self):
         service = "openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini"
@@ -212,20 +285,30 @@ class MainWindow(QMainWindow):
         self.validate_api_key_input()
 
     def select_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select PO File", "", "PO Files (*.po)")
-        if file_path:
-            self.load_file(file_path)
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select PO Files", "", "PO Files (*.po *.pot)")
+        if file_paths:
+            self.load_files(file_paths)
 
     def load_file(self, file_path: str):
-        success, message = self.file_manager.load_file(file_path)
+        self.load_files([file_path])
+
+    def load_files(self, file_paths: list):
+        success, message = self.file_manager.load_files(file_paths)
         self.logger.log(message)
         if success:
-            self.po_model = POTableModel(file_path)
+            self.po_model = POTableModel(self.file_manager.po_index)
+            self.po_model.scanned.connect(self.entries_indexed)
+            self.po_model.failed.connect(lambda error: self.logger.log(f"Error loading file: {error}", "error"))
             self.preview_table.setModel(self.po_model)
             self.translate_button.setEnabled(True)
-            self.status_summary.setText(f"Total: {len(self.file_manager.get_entries())} | Translated: 0 | ETA: 0s")
+            self.status_summary.setText("Total: … | Translated: 0 | ETA: 0s")
             self.progress_bar.setValue(0)
 
+    def entries_indexed(self, total: int, done: bool):
+        self.status_summary.setText(f"Total: {total}{'' if done else '…'} | Translated: 0 | ETA: 0s")
+        if done:
+            self.logger.log(f"Loaded {total} entries")
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             event.accept()
@@ -233,85 +316,123 @@ class MainWindow(QMainWindow):
             event.ignore()
 
     def dropEvent(self, event):
+        file_paths = []
         for url in event.mimeData().urls():
             file_path = url.toLocalFile()
-            if file_path.endswith('.po'):
-                self.load_file(file_path)
+            if file_path.endswith(('.po', '.pot')):
+                file_paths.append(file_path)
             else:
-                self.logger.log(f"File '{file_path}' must be a .po file", "error")
+                self.logger.log(f"File '{file_path}' must be a .po or .pot file", "error")
+        if file_paths:
+            self.load_files(file_paths)
 
     def translate_file(self):
-        if not self.file_manager.po_file or not self.api_key_input.text().strip():
+        if self.file_manager.po_index is None or not self.api_key_input.text().strip():
             self.logger.log("Select a .po file and enter an API key", "error")
             return
         service = "openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini"
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        api_manager = APIManager(service, self.api_key_input.text().strip())
-        is_valid, message = loop.run_until_complete(api_manager.validate_api_key())
-        loop.close()
-        if not is_valid:
-            self.logger.log("Invalid API key", "error")
+        api_key = self.api_key_input.text().strip()
+        if self.key_validator.is_valid(service, api_key):
+            self.start_translation(service)
             return
+        # Checked in the background; key_validated() starts the run once the key passes.
+        self.pending_start = (service, api_key)
+        self.translate_button.setEnabled(False)
+        self.key_status_label.setText("Checking API key...")
+        self.key_validator.validate(service, api_key)
 
+    def start_translation(self, service: str):
+        self.settings.save_setting("concurrency", self.concurrency_spin.value())
+        self.settings.save_setting("batch_size", self.batch_size_spin.value())
+        self.settings.save_setting("translate_placeholders", self.translate_placeholders_checkbox.isChecked())
+        self.settings.save_setting("use_memory", self.use_memory_checkbox.isChecked())
+        self.settings.save_setting("balance_models", self.balance_checkbox.isChecked())
+        self.settings.save_setting("compile_mo", self.compile_mo_checkbox.isChecked())
+        self.settings.save_setting("hedge_requests", self.hedge_checkbox.isChecked())
+        self.settings.save_setting("verbose_log", self.verbose_log_checkbox.isChecked())
+        self.settings.save_setting("fuzzy_threshold", self.fuzzy_spin.value())
         self.translate_button.setEnabled(False)
         self.pause_button.setEnabled(True)
         self.stop_button.setEnabled(True)
+        self.start_translation_thread(service)
+
+    def pool_keys(self, service: str) -> dict:
+        keys = {name: self.settings.load_api_key(name) for name in ("openrouter", "gemini")}
+        keys[service] = self.api_key_input.text().strip()
+        return keys
+
+    def start_translation_thread(self, service: str):
         self.translation_thread = TranslationThread(
-            self.file_manager.po_file.filepath, self.language_combo.currentData() or "en",
+            self.file_manager.file_paths, self.language_combo.currentData() or "en",
             self.api_key_input.text().strip(), APIModels.get_models(service)[self.model_combo.currentIndex()][1],
-            service, self.context, self.overwrite_checkbox.isChecked(), self.translate_placeholders_checkbox.isChecked()
+            service, self.context, self.overwrite_checkbox.isChecked(), self.translate_placeholders_checkbox.isChecked(),
+            concurrency=self.concurrency_spin.value(), batch_size=self.batch_size_spin.value(),
+            memory=self.translation_memory if self.use_memory_checkbox.isChecked() else None,
+            pool_keys=self.pool_keys(service) if self.balance_checkbox.isChecked() else None,
+            compile_mo=self.compile_mo_checkbox.isChecked(), verbose=self.verbose_log_checkbox.isChecked(),
+            glossary=self.load_glossary(), fuzzy_threshold=self.fuzzy_spin.value() / 100,
+            fuzzy_hint_threshold=self.FUZZY_HINT_SIMILARITY if self.fuzzy_spin.value() else 0.0,
+            previous_files=self.previous_paths, hedge_budget=self.HEDGE_BUDGET if self.hedge_checkbox.isChecked() else 0.0
         )
         self.translation_thread.progress.connect(self.progress_bar.setValue)
-        self.translation_thread.log.connect(self.logger.log)
+        self.translation_thread.logs.connect(self.logger.log_many)
         self.translation_thread.finished.connect(self.translation_finished)
-        self.translation_thread.preview.connect(self.update_preview)
+        self.translation_thread.previews.connect(self.update_previews)
+        self.translation_thread.stats.connect(self.status_summary.setText)
+        self.export_stats_button.setEnabled(False)
         self.translation_thread.start()
 
     def pause_translation(self):
-        if self.translation_thread:
-            self.translation_thread.running = False  # Pause by stopping the loop
-            self.pause_button.setEnabled(False)
-            self.stop_button.setEnabled(True)
+        if not self.translation_thread:
+            return
+        if self.translation_thread.paused:
+            self.translation_thread.resume()
+            self.pause_button.setText("Pause")
+            self.logger.log("Translation resumed")
+        else:
+            self.translation_thread.pause()
+            self.pause_button.setText("Resume")
             self.logger.log("Translation paused")
 
     def stop_translation(self):
         if self.translation_thread:
-            self.translation_thread.running = False
-            self.translation_thread.terminate()
+            self.translation_thread.stop()
             self.translation_thread.wait()
             self.translate_button.setEnabled(True)
             self.pause_button.setEnabled(False)
+            self.pause_button.setText("Pause")
             self.stop_button.setEnabled(False)
             self.logger.log("Translation stopped")
 
-    def update_preview(self, row: int, original: str, translation: str):
+    def update_previews(self, rows: list):
         if self.po_model:
-            index = self.po_model.index(row, 1)
-            self.po_model.setData(index, translation, Qt.EditRole)
+            self.po_model.set_translations([(row, translation, fuzzy) for row, _, translation, fuzzy in rows])
 
     def translation_finished(self, output_file: str, failed_entries: list):
         self.translate_button.setEnabled(True)
         self.pause_button.setEnabled(False)
+        self.pause_button.setText("Pause")
         self.stop_button.setEnabled(False)
         self.progress_bar.setValue(100)
+        self.export_stats_button.setEnabled(True)
         if output_file:
-            self.po_model.save(output_file)
+            # The engine already wrote the file (and its .mo); saving the preview model over it would drop previous_msgid.
             self.logger.log(f"Translation saved at {output_file}")
         if failed_entries:
             dialog = RetryDialog(failed_entries, self)
             if dialog.exec():
-                self.translation_thread = TranslationThread(
-                    self.file_manager.po_file.filepath, self.language_combo.currentData() or "en",
-                    self.api_key_input.text().strip(), APIModels.get_models("openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini")[self.model_combo.currentIndex()][1],
-                    "openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini", self.context,
-                    self.overwrite_checkbox.isChecked(), self.translate_placeholders_checkbox.isChecked()
-                )
-                self.translation_thread.progress.connect(self.progress_bar.setValue)
-                self.translation_thread.log.connect(self.logger.log)
-                self.translation_thread.finished.connect(self.translation_finished)
-                self.translation_thread.preview.connect(self.update_preview)
-                self.translation_thread.start()
+                self.start_translation_thread("openrouter" if self.api_service_combo.currentIndex() == 0 else "gemini")
+
+    def export_stats(self):
+        if not self.translation_thread:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Run Statistics", "translation_stats.json", "JSON Files (*.json);;CSV Files (*.csv)")
+        if file_path:
+            try:
+                self.translation_thread.telemetry.export(file_path)
+                self.logger.log(f"Statistics exported to {file_path}")
+            except OSError as e:
+                self.logger.log(f"Could not export statistics: {e}", "error")
 
     def open_context_dialog(self):
         dialog = ContextDialog(self)
@@ -321,6 +442,36 @@ class MainWindow(QMainWindow):
             self.settings.save_setting("context", self.context)
             self.logger.log("Context updated")
 
+    def select_glossary(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Glossary Files", "", "Glossaries (*.csv *.tbx)")
+        if file_paths:
+            self.set_glossary_paths(file_paths)
+
+    def set_glossary_paths(self, file_paths: list):
+        self.glossary_paths = [path for path in file_paths if os.path.isfile(path)]
+        self.glossary_button.setText(f"Glossary: {len(self.glossary_paths)} file(s)" if self.glossary_paths else "Set Glossary")
+        self.settings.save_setting("glossary_paths", self.glossary_paths)
+
+    def select_previous(self):
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Previous Translations", "", "PO Files (*.po)")
+        if file_paths:
+            self.set_previous_paths(file_paths)
+
+    def set_previous_paths(self, file_paths: list):
+        self.previous_paths = [path for path in file_paths if os.path.isfile(path)]
+        self.previous_button.setText(f"Previous: {len(self.previous_paths)} file(s)" if self.previous_paths else "Set Previous Translation")
+
+    def load_glossary(self):
+        if not self.glossary_paths:
+            return None
+        try:
+            glossary = Glossary.load(self.glossary_paths, self.language_combo.currentData() or "en")
+        except GlossaryError as e:
+            self.logger.log(str(e), "error")
+            return None
+        self.logger.log(f"Glossary loaded: {len(glossary)} terms")
+        return glossary
+
     def load_settings(self):
         self.style_manager.theme = self.settings.load_setting("theme", "dark")
         self.setStyleSheet(self.style_manager.get_stylesheet())
@@ -333,13 +484,23 @@ class MainWindow(QMainWindow):
             if self.language_combo.itemData(idx) == lang:
                 self.language_combo.setCurrentIndex(idx)
                 break
-        self.translate_placeholders_checkbox.setChecked(self.settings.load_setting("translate_placeholders", False, bool))
+        self.translate_placeholders_checkbox.setChecked(self.settings.load_setting("translate_placeholders", True, bool))
         self.overwrite_checkbox.setChecked(self.settings.load_setting("overwrite_translations", False, bool))
+        self.concurrency_spin.setValue(self.settings.load_setting("concurrency", 8, int))
+        self.batch_size_spin.setValue(self.settings.load_setting("batch_size", 20, int))
+        self.use_memory_checkbox.setChecked(self.settings.load_setting("use_memory", True, bool))
+        self.balance_checkbox.setChecked(self.settings.load_setting("balance_models", False, bool))
+        self.compile_mo_checkbox.setChecked(self.settings.load_setting("compile_mo", False, bool))
+        self.hedge_checkbox.setChecked(self.settings.load_setting("hedge_requests", False, bool))
+        self.verbose_log_checkbox.setChecked(self.settings.load_setting("verbose_log", True, bool))
+        self.fuzzy_spin.setValue(self.settings.load_setting("fuzzy_threshold", 0, int))
         self.context = self.settings.load_setting("context", "", str)
+        self.set_glossary_paths(self.settings.load_setting("glossary_paths", [], list) or [])
 
     def closeEvent(self, event):
         if self.translation_thread and self.translation_thread.isRunning():
-            self.translation_thread.running = False
-            self.translation_thread.terminate()
+            self.translation_thread.stop()
             self.translation_thread.wait()
+        self.key_validator.stop()
+        self.translation_memory.close()
         event.accept()
\ No newline at end of file
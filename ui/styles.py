@@ -30,7 +30,7 @@ class StyleManager:
             QPushButton {{ background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #60A5FA, stop:1 #2563EB); color: {icon_color}; padding: 8px 16px; border-radius: 8px; border: none; }}
             QPushButton:hover {{ background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #93C5FD, stop:1 #1D4ED8); }}
             QPushButton:disabled {{ background: {'#555' if self.theme == 'dark' else '#A0A0A0'}; }}
-            QLineEdit, QTextEdit, QDoubleSpinBox, QSpinBox {{ background: {base_style['input_bg']}; color: {base_style['color']}; border: 1px solid {base_style['input_border']}; border-radius: 6px; padding: 6px; }}
+            QLineEdit, QTextEdit, QPlainTextEdit, QDoubleSpinBox, QSpinBox {{ background: {base_style['input_bg']}; color: {base_style['color']}; border: 1px solid {base_style['input_border']}; border-radius: 6px; padding: 6px; }}
             QComboBox {{ background: {base_style['input_bg']}; color: {base_style['color']}; border: 1px solid {base_style['input_border']}; border-radius: 6px; padding: 6px; }}
             QComboBox::drop-down {{ width: 20px; border: none; }}
             QComboBox::down-arrow {{ image: url({dropdown_close_icon}); width: 16px; height: 16px; }}